@@ -0,0 +1,78 @@
+"""本地文书识别基准测试
+
+在 ``fixtures/classifier_corpus.jsonl`` 标注语料上统计：
+- 准确率（仅规则，不调用大模型；低置信度时取规则的最佳猜测）；
+- 高置信度覆盖率（无需大模型即可确定结果的比例），以及高、低置信度两部分各自的准确率；
+- 单篇识别耗时（微秒）。
+
+语料除各类典型文书外，还包含互相引用的混合文书（引用判决的律师函、作为证据提交的起诉状）、
+残页、以及规则未覆盖的文书（答辩状、合同，标注为「未识别」），用于覆盖低置信度路径。
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_classifier.py --repeat 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from suitagent.classifier import classify_text  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "fixtures" / "classifier_corpus.jsonl"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=str(CORPUS))
+    parser.add_argument("--repeat", type=int, default=1000, help="计时重复次数")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as fh:
+        samples = [json.loads(line) for line in fh if line.strip()]
+
+    # 置信度不足时的回退函数只做记录，不真正调用大模型；返回「未识别」时保留规则结果
+    fallbacks = []
+
+    def record_fallback(text):
+        fallbacks.append(text)
+        return {"document_type": "未识别", "scenario": "未识别"}
+
+    correct = {True: 0, False: 0}
+    total = {True: 0, False: 0}
+    for sample in samples:
+        before = len(fallbacks)
+        result = classify_text(sample["text"], fallback=record_fallback)
+        confident = len(fallbacks) == before
+        ok = result.document_type == sample["label"]
+        total[confident] += 1
+        correct[confident] += ok
+        if not ok:
+            print(f"  ✗ {sample['id']}: 标注={sample['label']} 识别={result.document_type}"
+                  f"（{'高' if confident else '低'}置信度 {result.confidence:.2f}）")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for sample in samples:
+            classify_text(sample["text"])
+    elapsed = time.perf_counter() - start
+    per_doc_us = elapsed / (args.repeat * len(samples)) * 1e6
+
+    print(f"样本数:       {len(samples)}")
+    print(f"准确率:       {sum(correct.values()) / len(samples):.1%}")
+    print(f"规则覆盖率:   {1 - len(fallbacks) / len(samples):.1%}（其余需调用大模型）")
+    for confident, label in ((True, "高置信度"), (False, "低置信度")):
+        if total[confident]:
+            print(f"  {label}:   {correct[confident]}/{total[confident]} 正确"
+                  f"（{correct[confident] / total[confident]:.1%}）")
+    print(f"单篇耗时:     {per_doc_us:.1f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""期限计算基准测试
+
+在临时目录中生成大量合成案件（每个案件若干期限事件和工时记录），统计：
+- 纯计算耗时（所有案件的期限一次性向量化计算）；
+- 首次刷新耗时（读取登记文件、计算、写出全部案件报告和全所总览）；
+- 再次刷新耗时（登记文件未变化，使用缓存的记录重算，即每次批处理后的开销）；
+- 单个案件新增事件后的刷新耗时（重写该案件报告和全所总览 Markdown）；
+- 次日首次刷新耗时（剩余天数变化，重写全所总览，以及提醒级别变化的案件报告）；
+- 直接运行本模块时额外生成全所总览 XLSX 的耗时。
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_deadlines.py --cases 3000
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from suitagent.deadlines import (  # noqa: E402
+    EVENTS_FILE, HOURS_FILE, RULES, SCHEDULE_DIR, compute, load, case_dirs, load_calendar, refresh,
+)
+
+TODAY = dt.date(2026, 10, 17)
+
+
+def make_cases(root: Path, cases: int, events: int, rng: random.Random) -> None:
+    for n in range(cases):
+        schedule = root / f"案件{n:05d}" / SCHEDULE_DIR
+        schedule.mkdir(parents=True)
+        with open(schedule / EVENTS_FILE, "w", encoding="utf-8", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["事件", "起算日", "期间", "完成", "备注"])
+            for _ in range(events):
+                rule = rng.choice(RULES)
+                start = TODAY - dt.timedelta(days=rng.randint(0, 400))
+                writer.writerow([rule.event, start.isoformat(), "", "是" if rng.random() < 0.3 else "", ""])
+        with open(schedule / HOURS_FILE, "w", encoding="utf-8", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["日期", "人员", "工作内容", "工时"])
+            for _ in range(rng.randint(2, 10)):
+                day = TODAY - dt.timedelta(days=rng.randint(0, 60))
+                writer.writerow([day.isoformat(), rng.choice(["张律师", "李律师", "王助理"]), "阅卷", rng.choice([0.5, 1, 2, 3])])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=3000, help="案件数")
+    parser.add_argument("--events", type=int, default=5, help="每个案件的期限事件数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    load_calendar()  # 日历只在进程内构建一次，不计入各轮耗时
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_cases(root, args.cases, args.events, random.Random(args.seed))
+
+        events, _ = load(case_dirs(root))
+        start = time.perf_counter()
+        deadlines = compute(events, TODAY)
+        compute_seconds = time.perf_counter() - start
+
+        cold = refresh(root, TODAY)
+        warm = refresh(root, TODAY)
+        with open(root / "案件00000" / SCHEDULE_DIR / EVENTS_FILE, "a", encoding="utf-8", newline="") as fh:
+            csv.writer(fh).writerow(["答辩期", TODAY.isoformat(), "", "", ""])
+        changed = refresh(root, TODAY)
+        next_day = refresh(root, TODAY + dt.timedelta(days=1))
+        board = refresh(root, TODAY + dt.timedelta(days=1), board_xlsx=True)
+
+    print(f"案件数:       {args.cases}（共 {len(deadlines)} 项期限）")
+    print(f"向量化计算:   {compute_seconds * 1000:.1f} ms")
+    print(f"首次刷新:     {cold.total_seconds:.2f} s（写出 {cold.written} 份案件报告）")
+    print(f"再次刷新:     {warm.total_seconds:.2f} s（写出 {warm.written} 份案件报告，其中计算 {warm.compute_seconds * 1000:.0f} ms）")
+    print(f"新增事件后:   {changed.total_seconds:.2f} s（写出 {changed.written} 份案件报告及全所总览）")
+    print(f"次日刷新:     {next_day.total_seconds:.2f} s（写出 {next_day.written} 份案件报告及全所总览）")
+    print(f"生成总览XLSX: {board.total_seconds:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""流式解析基准测试
+
+生成两类合成 PDF 并统计吞吐（页/秒）与峰值内存（RSS）：
+- 电子版：reportlab 直接写入文字，带文本层；
+- 扫描版：Pillow 将文字绘制成图片后合成 PDF，无文本层，需要 OCR。
+
+测试文件在主进程中生成，每种 PDF 在独立子进程中解析，峰值内存不含生成测试文件的开销，
+两轮之间也互不影响。
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_ingest.py --pages 50 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from suitagent.ingest import iter_pages  # noqa: E402
+
+SAMPLE_LINES = [
+    "Plaintiff: Zhang San  Defendant: Li Si",
+    "Claims: repayment of loan principal 100,000 yuan and interest.",
+    "Facts and reasons: the defendant borrowed money on 2024-01-01.",
+]
+
+
+def make_digital_pdf(path: Path, pages: int) -> None:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(path), pagesize=A4)
+    for n in range(pages):
+        y = 800
+        for line in SAMPLE_LINES * 10:
+            c.drawString(60, y, f"[{n + 1}] {line}")
+            y -= 20
+        c.showPage()
+    c.save()
+
+
+def make_scanned_pdf(path: Path, pages: int) -> None:
+    from PIL import Image, ImageDraw
+
+    def render(n: int) -> Image.Image:
+        image = Image.new("L", (1240, 1754), 255)  # A4 @150dpi
+        draw = ImageDraw.Draw(image)
+        y = 100
+        for line in SAMPLE_LINES * 10:
+            draw.text((100, y), f"[{n + 1}] {line}", fill=0)
+            y += 40
+        return image
+
+    first = render(0)
+    first.save(str(path), "PDF", resolution=150, save_all=True,
+               append_images=[render(n) for n in range(1, pages)])
+
+
+def peak_rss_mb() -> float:
+    """本进程峰值 RSS 加上 OCR 子进程中的最大峰值（MB）"""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) / scale
+
+
+def run_parse(path: Path, workers: int, dpi: int) -> None:
+    """在子进程中执行：解析文件，输出页数、OCR 页数、耗时和峰值内存"""
+    start = time.perf_counter()
+    count = 0
+    ocr = 0
+    for page in iter_pages(path, ocr_workers=workers, dpi=dpi):
+        count += 1
+        ocr += page.source == "ocr"
+    elapsed = time.perf_counter() - start
+    print(f"{count} {ocr} {elapsed} {peak_rss_mb()}")
+
+
+def bench(label: str, path: Path, workers: int, dpi: int) -> None:
+    output = subprocess.run(
+        [sys.executable, __file__, "--parse", str(path), "--workers", str(workers), "--dpi", str(dpi)],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+    count, ocr, elapsed, rss = int(output[0]), int(output[1]), float(output[2]), float(output[3])
+    print(f"{label:<8} 页数={count:<4} OCR页={ocr:<4} 耗时={elapsed:7.2f}s "
+          f"吞吐={count / elapsed:7.2f} 页/秒 峰值RSS={rss:8.1f} MB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--parse", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.parse:
+        run_parse(Path(args.parse), args.workers, args.dpi)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        digital = Path(tmp) / "digital.pdf"
+        scanned = Path(tmp) / "scanned.pdf"
+        make_digital_pdf(digital, args.pages)
+        make_scanned_pdf(scanned, args.pages)
+
+        bench("电子版", digital, args.workers, args.dpi)
+        bench("扫描版", scanned, args.workers, args.dpi)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""上下文裁剪基准测试
+
+用合成的样例案件材料，按 README 中的使用场景统计送入 Agent 的 token 数变化，
+以及 token 估算与裁剪本身的耗时。
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_packer.py --budget 6000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from suitagent.packer import estimate_tokens, pack  # noqa: E402
+
+FILLER = ("双方当事人就借款的交付、利息的约定以及还款情况发表了意见，"
+          "法庭对相关事实进行了询问，当事人对部分事实存在不同陈述。")
+
+
+def make_complaint(rng: random.Random) -> str:
+    parts = ["# 民事起诉状", "原告：张三，男，1980年1月1日出生。", "被告：李四，男，1982年3月5日出生。",
+             "## 诉讼请求", "1. 判令被告偿还借款本金100000元；", "2. 判令被告按年利率6%支付逾期利息；",
+             "3. 判令被告承担本案诉讼费用。", "## 事实与理由"]
+    parts += [FILLER * rng.randint(2, 4) for _ in range(20)]
+    parts += ["此致", "北京市朝阳区人民法院"]
+    return "\n\n".join(parts)
+
+
+def make_evidence_bundle(rng: random.Random) -> str:
+    parts = []
+    for n in range(1, 41):
+        parts.append(f"证据{n}：{rng.choice(['借条', '银行转账记录', '微信聊天记录', '催款短信', '收据'])}")
+        parts.append(f"证明目的：{rng.choice(['借款合意', '借款已实际交付', '原告多次催讨', '利息约定'])}")
+        parts.append(FILLER * rng.randint(3, 8))
+        # 每页都带的页眉和声明
+        parts.append("北京某律师事务所 证据材料汇编")
+        parts.append("本材料仅供本案诉讼使用，未经许可不得对外提供。")
+        parts.append(f"第 {n} 页 共 40 页")
+    return "\n\n".join(parts)
+
+
+def make_transcript(rng: random.Random) -> str:
+    speakers = ["审判员", "原告代理人", "被告代理人", "原告", "被告"]
+    lines = ["# 庭审笔录", "时间：2024年5月10日", "书记员：报告审判员，当事人均已到庭。"]
+    for turn in range(1200):
+        if turn % 40 == 0:
+            lines.append(f"北京市朝阳区人民法院 庭审笔录 第 {turn // 40 + 1} 页")
+        speaker = rng.choice(speakers)
+        topic = rng.choice(["借款交付", "利息约定", "还款情况", "证据真实性", "诉讼时效", "管辖"])
+        lines.append(f"{speaker}：关于{topic}，{FILLER[:rng.randint(20, len(FILLER))]}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=int, default=6000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    complaint, evidence, transcript = make_complaint(rng), make_evidence_bundle(rng), make_transcript(rng)
+    scenarios = [
+        ("被告应诉", complaint + "\n\n" + evidence, "诉讼请求 借款 利息 事实与理由"),
+        ("新证据质证", evidence, "银行转账记录 借款已实际交付 证明目的"),
+        ("庭审后分析", transcript, "利息约定 诉讼时效 证据真实性"),
+    ]
+
+    print(f"{'场景':<8}{'原文 tokens':>12}{'送入 tokens':>12}{'减少':>8}{'耗时':>10}")
+    for name, text, query in scenarios:
+        start = time.perf_counter()
+        result = pack(text, query, args.budget)
+        elapsed = (time.perf_counter() - start) * 1000
+        saved = 1 - result.packed_tokens / result.original_tokens
+        print(f"{name:<8}{result.original_tokens:>12}{result.packed_tokens:>12}{saved:>8.1%}{elapsed:>8.1f}ms")
+
+    sample = transcript * 10
+    start = time.perf_counter()
+    for _ in range(20):
+        estimate_tokens(sample)
+    elapsed = time.perf_counter() - start
+    size_mb = len(sample.encode("utf-8")) * 20 / 1024 / 1024
+    print(f"token 估算速度: {size_mb / elapsed:.0f} MB/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""文书渲染基准测试
+
+生成一份约 200 页的合成综合报告，分别用两种方式渲染为 Word 和 PDF，
+比较吞吐（份/秒）与峰值内存：
+
+- 逐份重建：每份文档重新加载模板、设置样式，先在内存中构建完整文档再保存
+  （python-docx 逐段 ``add_paragraph``；reportlab 版式相同，但重建样式并先生成完整 story）；
+- 流式渲染：``suitagent.render``，模板每个进程只编译一次，正文边解析边写出。
+
+每种方式在独立子进程中运行，峰值内存互不影响。最后比较一个案件（12 份文书
+和 1 份综合报告）顺序渲染与多进程并行渲染的总耗时。
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_render.py --pages 200 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from suitagent.render import (  # noqa: E402
+    _page_number, _pdf_flowables, iter_blocks, pdf_document, pdf_styles, render_docx, render_many, render_pdf,
+)
+
+MODES = ("baseline-docx", "stream-docx", "baseline-pdf", "stream-pdf")
+
+# 每页约 1100 个汉字（A4、宋体小四）
+CHARS_PER_PAGE = 1100
+
+SENTENCES = (
+    "原告主张被告于2023年3月向其借款十万元，并约定按年利率百分之六计息。",
+    "被告辩称实际收到的款项仅为五万元，其余部分系预先扣除的利息。",
+    "根据《最高人民法院关于审理民间借贷案件适用法律若干问题的规定》第二十六条，预先在本金中扣除利息的，应当按照实际出借金额认定本金。",
+    "从现有证据看，银行转账记录能够与借条相互印证，但微信聊天记录的完整性有待核实。",
+    "建议在庭前补充调取原告的银行账户流水，以查明款项的实际去向。",
+)
+
+
+def make_report(pages: int, rng: random.Random) -> str:
+    parts = ["# 案件综合分析报告", "", "> 本报告由各 Agent 的分析结果整合而成。", ""]
+    chars = 0
+    section = 0
+    while chars < pages * CHARS_PER_PAGE:
+        section += 1
+        parts += [f"## 第{section}部分 争议焦点分析", ""]
+        for sub in range(1, 4):
+            parts += [f"### {section}.{sub} 事实认定", ""]
+            for _ in range(3):
+                paragraph = "".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 6)))
+                parts += [paragraph, ""]
+                chars += len(paragraph)
+            parts += ["- **风险等级**：中", "- 应对建议：补充证据，申请证人出庭", ""]
+        parts += ["| 证据名称 | 证明目的 | 质证意见 |", "|------|------|------|"]
+        parts += [f"| 证据{n} | 借款已实际交付 | 对真实性无异议，对证明目的有异议 |" for n in range(1, 9)]
+        parts.append("")
+        chars += 400
+    return "\n".join(parts) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# 逐份重建（对照组）
+# ---------------------------------------------------------------------------
+
+
+def baseline_docx(source: Path, target: Path) -> None:
+    import docx
+    from docx.shared import Pt
+
+    document = docx.Document()
+    style = document.styles["Normal"]
+    style.font.name = "宋体"
+    style.font.size = Pt(12)
+    blocks = list(iter_blocks(source.read_text(encoding="utf-8").splitlines()))
+    for n, block in enumerate(blocks):
+        if block.kind == "heading":
+            document.add_heading(block.text, 0 if n == 0 else min(block.level, 9))
+        elif block.kind == "bullet":
+            document.add_paragraph(block.text, style="List Bullet")
+        elif block.kind == "table":
+            table = document.add_table(rows=len(block.rows), cols=len(block.rows[0]))
+            table.style = "Table Grid"
+            for row, cells in zip(table.rows, block.rows):
+                for cell, text in zip(row.cells, cells):
+                    cell.text = text
+        else:
+            document.add_paragraph(block.text)
+    document.save(target)
+
+
+def baseline_pdf(source: Path, target: Path) -> None:
+    # 版式与流式渲染相同，但每份文档重新创建字体和样式，并先构建完整的 story
+    pdf_styles.cache_clear()
+    doc = pdf_document(target, source.stem)
+    blocks = list(iter_blocks(source.read_text(encoding="utf-8").splitlines()))
+    story = list(_pdf_flowables(blocks, doc.width))
+    doc.build(story, onFirstPage=_page_number, onLaterPages=_page_number)
+
+
+def run_mode(mode: str, source: Path, repeat: int) -> None:
+    """在子进程中执行：按指定方式重复渲染，输出耗时和峰值内存"""
+    fmt = mode.split("-")[1]
+    target = source.with_name(f"{mode}.{fmt}")
+    render = {
+        "baseline-docx": baseline_docx,
+        "baseline-pdf": baseline_pdf,
+        "stream-docx": render_docx,
+        "stream-pdf": render_pdf,
+    }[mode]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render(source, target)
+    elapsed = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    print(f"{elapsed} {rss_mb} {target.stat().st_size}")
+
+
+def bench_case(root: Path, report: str, workers: int, rng: random.Random) -> None:
+    writer = root / "案件" / "04_法律文书"
+    reporter = root / "案件" / "05_综合报告"
+    writer.mkdir(parents=True)
+    reporter.mkdir(parents=True)
+    names = ("起诉状", "答辩状", "代理词", "上诉状", "质证意见", "证据目录", "律师函",
+             "法律意见书", "和解协议", "申请书", "授权委托书", "法律服务方案书")
+    for name in names:
+        (writer / f"{name}.md").write_text(make_report(5, rng).replace("案件综合分析报告", name), encoding="utf-8")
+    (reporter / "综合报告.md").write_text(report, encoding="utf-8")
+    sources = sorted(writer.glob("*.md")) + [reporter / "综合报告.md"]
+
+    start = time.perf_counter()
+    for source in sources:
+        baseline_docx(source, source.with_suffix(".docx"))
+        baseline_pdf(source, source.with_suffix(".pdf"))
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = render_many(sources, workers=workers, force=True)
+    parallel = time.perf_counter() - start
+    assert not any(result.error for result in results), [r.error for r in results if r.error]
+
+    print(f"\n案件渲染（{len(sources)} 份 × Word/PDF）")
+    print(f"  逐份重建、顺序执行: {sequential:6.2f} s")
+    print(f"  流式渲染、{workers} 进程:    {parallel:6.2f} s（{sequential / parallel:.1f}×）")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200, help="综合报告页数（约）")
+    parser.add_argument("--repeat", type=int, default=3, help="每种方式渲染次数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="案件并行渲染进程数")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, Path(args.source), args.repeat)
+        return 0
+
+    rng = random.Random(0)
+    report = make_report(args.pages, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "综合报告.md"
+        source.write_text(report, encoding="utf-8")
+        print(f"综合报告：约 {args.pages} 页，{len(report)} 字符，每种方式渲染 {args.repeat} 次")
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--source", str(source), "--repeat", str(args.repeat)],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            elapsed, rss, size = float(output[0]), float(output[1]), int(output[2])
+            print(f"  {mode:<14} 吞吐={args.repeat / elapsed:6.2f} 份/秒 峰值RSS={rss:7.1f} MB "
+                  f"文件={size / 1024:7.0f} KB")
+        bench_case(Path(tmp), report, args.workers, rng)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
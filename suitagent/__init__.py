@@ -0,0 +1,7 @@
+"""SuitAgent 本地 Python 工具集
+
+为各 Agent 提供可在本地确定性执行的辅助能力（文档解析等），
+减少对大模型的重复调用。各模块均可通过 ``python -m suitagent.<模块名>`` 直接运行。
+"""
+
+__version__ = "1.0.0"
@@ -0,0 +1,327 @@
+"""多案件批量处理
+
+将 ``input/`` 中的文件按案件分组，多个案件并发执行「文档解析 → 文档识别」，
+文档识别先走本地规则（见 :mod:`suitagent.classifier`），低置信度时才调用大模型。
+结果写入 ``output/[案件编号]/`` 的标准目录结构（01_案件分析 … 06_日程管理）。
+
+分组规则：
+- ``input/`` 下的子目录视为一个案件，目录名即案件编号；
+- 散放的文件按文件名中的案号（如「（2024）京0105民初12345号」）归组，
+  没有案号的文件以文件名作为案件编号。
+
+每个案件先写入 ``output/.[案件编号].partial/``，全部完成后再逐个文件移入正式目录，
+最后写入 ``.batch_state.json``。中途崩溃后重新运行，已完成且输入未变化的案件会被跳过。
+每批处理结束后重算全所期限总览（见 :mod:`suitagent.deadlines`）。
+各环节的耗时与读写量记入 ``output/[案件编号]/.trace.jsonl``（见 :mod:`suitagent.trace`）。
+
+用法：
+    python -m suitagent.batch
+    python -m suitagent.batch --workers 4 --max-llm 2
+    python -m suitagent.batch --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextvars
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .cache import ExtractionCache, file_digest, iter_pages_cached
+from .classifier import classify_text
+from .packer import estimate_tokens
+from .trace import RUN_ENV, new_run_id, span, tracing, write_text
+
+CASE_DIRS = (
+    "01_案件分析",
+    "02_法律研究",
+    "03_证据材料",
+    "04_法律文书",
+    "05_综合报告",
+    "06_日程管理",
+)
+STATE_FILE = ".batch_state.json"
+
+# 案号，如（2024）京0105民初12345号、(2023)沪01民终678号
+CASE_NO_RE = re.compile(r"[（(]\d{4}[）)][\u4e00-\u9fa5A-Za-z0-9]{1,20}?\d+号")
+IGNORED_NAMES = {".gitkeep", ".DS_Store", "Thumbs.db"}
+
+Classifier = Callable[[str], Dict[str, str]]
+
+
+@dataclass
+class Case:
+    case_id: str
+    files: List[Path] = field(default_factory=list)
+
+
+@dataclass
+class CaseResult:
+    case_id: str
+    status: str  # "done"、"skipped" 或 "failed"
+    seconds: float = 0.0
+    error: str = ""
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[\\/:*?"<>|]', "_", name).strip() or "未命名案件"
+
+
+def group_cases(input_dir: Path) -> List[Case]:
+    """按子目录和文件名中的案号把输入文件分组为案件"""
+    cases: Dict[str, Case] = {}
+    for entry in sorted(input_dir.iterdir()):
+        if entry.name in IGNORED_NAMES or entry.name.startswith("."):
+            continue
+        if entry.is_dir():
+            files = sorted(
+                p for p in entry.rglob("*")
+                if p.is_file() and p.name not in IGNORED_NAMES and not p.name.startswith(".")
+            )
+            if files:
+                case_id = _safe_name(entry.name)
+                cases.setdefault(case_id, Case(case_id)).files.extend(files)
+        elif entry.is_file():
+            match = CASE_NO_RE.search(entry.stem)
+            case_id = _safe_name(match.group(0) if match else entry.stem)
+            cases.setdefault(case_id, Case(case_id)).files.append(entry)
+    return list(cases.values())
+
+
+def case_root(files: List[Path]) -> Path:
+    """案件文件的公共上级目录"""
+    return Path(os.path.commonpath([str(path.parent) for path in files]))
+
+
+def extracted_names(files: List[Path]) -> Dict[Path, str]:
+    """各文件在 ``文档提取/`` 中的输出名（不含 ``.md``）
+
+    默认取文件名主干；主干相同的文件（不同子目录下的同名文件，或仅扩展名不同）
+    改用相对案件目录的路径，如 ``证据1_说明.txt``，避免互相覆盖。
+    """
+    if not files:
+        return {}
+    root = case_root(files)
+    stems = Counter(path.stem for path in files)
+    names: Dict[Path, str] = {}
+    used = set()
+    for path in files:
+        name = path.stem if stems[path.stem] == 1 else "_".join(path.relative_to(root).parts)
+        base, n = name, 1
+        while name in used:
+            n += 1
+            name = f"{base}-{n}"
+        used.add(name)
+        names[path] = name
+    return names
+
+
+def llm_classify(text: str, timeout: int = 300) -> Dict[str, str]:
+    """通过 Claude Code CLI 识别文书类型和适用场景"""
+    prompt = (
+        "请判断以下法律文档的文书类型（起诉状、证据材料、庭审笔录、判决书、律师函或其他）"
+        "以及适用场景（被告应诉、证据质证、庭审后分析、判决分析、法律催告或其他）。"
+        '只输出一行 JSON：{"document_type": "...", "scenario": "..."}\n\n' + text
+    )
+    try:
+        completed = subprocess.run(
+            ["claude", "-p", prompt],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            check=True,
+        )
+        match = re.search(r"\{.*?\}", completed.stdout, re.S)
+        if match:
+            data = json.loads(match.group(0))
+            return {
+                "document_type": str(data.get("document_type", "其他")),
+                "scenario": str(data.get("scenario", "其他")),
+            }
+    except (OSError, subprocess.SubprocessError, ValueError):
+        pass
+    return {"document_type": "未识别", "scenario": "未识别"}
+
+
+class BatchRunner:
+    """多案件并发处理器
+
+    Args:
+        output_dir: 输出根目录
+        case_workers: 同时处理的案件数
+        max_llm_calls: 同时进行的大模型调用数上限
+        llm: 本地规则低置信度时调用的大模型识别函数，默认为 :func:`llm_classify`
+        cache: 解析缓存
+        run_id: 追踪用的运行 ID，默认取环境变量 ``SUITAGENT_RUN_ID``，未设置时自动生成
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        case_workers: int = 4,
+        max_llm_calls: int = 2,
+        llm: Optional[Classifier] = None,
+        cache: Optional[ExtractionCache] = None,
+        run_id: Optional[str] = None,
+    ):
+        self.output_dir = Path(output_dir)
+        self.case_workers = max(1, case_workers)
+        self.llm = llm or llm_classify
+        self.cache = cache or ExtractionCache()
+        self.run_id = run_id or os.environ.get(RUN_ENV) or new_run_id()
+        self._llm_slots = threading.BoundedSemaphore(max(1, max_llm_calls))
+        # 每个案件分到的 OCR 进程数，避免多案件同时 OCR 时进程数失控
+        self._ocr_workers = max(1, (os.cpu_count() or 1) // self.case_workers)
+
+    def _load_state(self, case_dir: Path) -> dict:
+        try:
+            with open(case_dir / STATE_FILE, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _llm(self, text: str) -> Dict[str, str]:
+        with self._llm_slots, span("大模型识别", "llm") as current:
+            label = self.llm(text)
+            current.add(
+                tokens_in=estimate_tokens(text),
+                tokens_out=estimate_tokens(json.dumps(label, ensure_ascii=False)),
+            )
+            return label
+
+    def _classify(self, text: str) -> Dict[str, str]:
+        return classify_text(text, fallback=self._llm).to_dict()
+
+    def process_case(self, case: Case) -> CaseResult:
+        start = time.perf_counter()
+        case_dir = self.output_dir / case.case_id
+        inputs = {str(path): file_digest(path) for path in case.files}
+
+        state = self._load_state(case_dir)
+        if state.get("status") == "done" and state.get("inputs") == inputs:
+            return CaseResult(case.case_id, "skipped")
+
+        with tracing(case_dir, "批处理", run=self.run_id, files=len(case.files)):
+            self._process(case, case_dir, inputs)
+        return CaseResult(case.case_id, "done", time.perf_counter() - start)
+
+    def _process(self, case: Case, case_dir: Path, inputs: Dict[str, str]) -> None:
+        staging = self.output_dir / f".{case.case_id}.partial"
+        if staging.exists():
+            shutil.rmtree(staging)
+        for name in CASE_DIRS:
+            (staging / name).mkdir(parents=True)
+
+        extracted_dir = staging / CASE_DIRS[0] / "文档提取"
+        extracted_dir.mkdir()
+        rows = []
+        names = extracted_names(case.files)
+        root = case_root(case.files)
+        # 解析下一个文件的同时，上一个文件的识别请求在后台线程中进行
+        with ThreadPoolExecutor(max_workers=len(case.files)) as classify_pool:
+            for path in case.files:
+                pages = list(iter_pages_cached(path, cache=self.cache, ocr_workers=self._ocr_workers))
+                text = "\n\n".join(page.text for page in pages)
+                label = path.relative_to(root).as_posix()
+                write_text(extracted_dir / f"{names[path]}.md", f"# {label}\n\n{text}\n")
+                # 复制上下文，使识别线程中的 span 归入本案件的追踪
+                context = contextvars.copy_context()
+                rows.append((label, len(pages), classify_pool.submit(context.run, self._classify, text)))
+        rows = [(name, page_count, future.result()) for name, page_count, future in rows]
+
+        lines = [
+            f"# 文档识别结果 - {case.case_id}",
+            "",
+            "| 文件 | 页数 | 文书类型 | 自动场景 | 建议工作流 | 识别方式 |",
+            "| ---- | ---- | -------- | -------- | ---------- | -------- |",
+        ]
+        for name, page_count, label in rows:
+            lines.append(
+                f"| {name} | {page_count} | {label['document_type']} | {label['scenario']} "
+                f"| {label['workflow']} | {label['source']}（{label['confidence']}） |"
+            )
+        write_text(staging / CASE_DIRS[0] / "文档识别结果.md", "\n".join(lines) + "\n")
+
+        self._commit(staging, case_dir)
+        state = {"status": "done", "inputs": inputs, "finished": time.time()}
+        tmp_state = case_dir / (STATE_FILE + ".tmp")
+        tmp_state.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_state, case_dir / STATE_FILE)
+
+    @staticmethod
+    def _commit(staging: Path, case_dir: Path) -> None:
+        """把暂存目录中的文件逐个原子替换到正式目录，保留其他 Agent 已生成的文件"""
+        for src in sorted(staging.rglob("*")):
+            dest = case_dir / src.relative_to(staging)
+            if src.is_dir():
+                dest.mkdir(parents=True, exist_ok=True)
+            else:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(src, dest)
+        shutil.rmtree(staging)
+
+    def run(self, cases: List[Case]) -> List[CaseResult]:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        results = []
+        with ThreadPoolExecutor(max_workers=self.case_workers) as pool:
+            futures = {pool.submit(self.process_case, case): case for case in cases}
+            for future in as_completed(futures):
+                case = futures[future]
+                try:
+                    results.append(future.result())
+                except Exception as exc:  # 单个案件失败不影响其他案件
+                    results.append(CaseResult(case.case_id, "failed", error=str(exc)))
+        return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="批量处理 input/ 中的多个案件")
+    parser.add_argument("--input", default="input", help="输入目录")
+    parser.add_argument("--output", default="output", help="输出目录")
+    parser.add_argument("--workers", type=int, default=4, help="同时处理的案件数")
+    parser.add_argument("--max-llm", type=int, default=2, help="同时进行的大模型调用数上限")
+    parser.add_argument("--dry-run", action="store_true", help="只显示案件分组，不执行")
+    args = parser.parse_args(argv)
+
+    cases = group_cases(Path(args.input))
+    if not cases:
+        print(f"{args.input} 中没有待处理的文件")
+        return 0
+
+    if args.dry_run:
+        for case in cases:
+            print(f"{case.case_id}（{len(case.files)} 个文件）")
+            for path in case.files:
+                print(f"  - {path}")
+        return 0
+
+    runner = BatchRunner(Path(args.output), case_workers=args.workers, max_llm_calls=args.max_llm)
+    start = time.perf_counter()
+    results = runner.run(cases)
+    for result in sorted(results, key=lambda r: r.case_id):
+        detail = f"{result.seconds:.1f}s" if result.status == "done" else result.error
+        print(f"[{result.status}] {result.case_id} {detail}")
+    print(f"共 {len(results)} 个案件，总耗时 {time.perf_counter() - start:.1f}s")
+    print(f"运行 ID：{runner.run_id}（后续 Agent 步骤用 {RUN_ENV}={runner.run_id} python -m suitagent.trace record 补记）")
+
+    # 每批处理后重算全所期限总览
+    from .deadlines import refresh as refresh_deadlines
+
+    board = refresh_deadlines(Path(args.output))
+    print(f"期限总览已更新：{board.cases} 个案件，{board.total_seconds:.2f}s")
+    return 1 if any(r.status == "failed" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
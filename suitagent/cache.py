@@ -0,0 +1,236 @@
+"""文档解析结果缓存
+
+以「文件内容哈希 + 解析器版本 + 解析参数」为键，把逐页提取结果持久化到磁盘。
+同一案件的起诉状、证据材料在不同工作流（应诉、新证据质证、庭审后分析）中
+重复出现时，直接读取缓存而不再重复 OCR。
+
+缓存按总大小做 LRU 淘汰：命中时刷新条目的修改时间，超出上限时删除最久未用的条目。
+
+用法：
+    python -m suitagent.cache stats
+    python -m suitagent.cache list
+    python -m suitagent.cache prune --max-size 200M
+    python -m suitagent.cache clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+from .ingest import DEFAULT_DPI, DEFAULT_LANG, EXTRACTOR_VERSION, MIN_TEXT_CHARS, PageText, iter_pages
+from .trace import activate, span, start_span
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("SUITAGENT_CACHE_DIR", ".cache/suitagent")) / "extraction"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_size(text: str) -> int:
+    """解析 ``500M``、``2G``、``1048576`` 这类大小写法"""
+    text = text.strip().upper()
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size} B"
+
+
+class ExtractionCache:
+    """按内容寻址的解析结果缓存"""
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(
+        content_hash: str,
+        dpi: int = DEFAULT_DPI,
+        lang: str = DEFAULT_LANG,
+        min_text_chars: int = MIN_TEXT_CHARS,
+    ) -> str:
+        # 扫描页阈值决定哪些页走 OCR，不同阈值的结果不能混用
+        return f"{content_hash}-v{EXTRACTOR_VERSION}-{lang.replace('+', '_')}-{dpi}-t{min_text_chars}"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[PageText]]:
+        entry = self._entry_path(key)
+        try:
+            with open(entry, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        # 刷新修改时间，作为 LRU 的访问顺序
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return [PageText(**page) for page in data["pages"]]
+
+    def put(self, key: str, pages: List[PageText], source_path: str = "") -> None:
+        entry = self._entry_path(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "key": key,
+            "source_path": source_path,
+            "extractor_version": EXTRACTOR_VERSION,
+            "created": time.time(),
+            "page_count": len(pages),
+            "ocr_pages": sum(page.source == "ocr" for page in pages),
+            "pages": [asdict(page) for page in pages],
+        }
+        # 先写临时文件再替换，避免中断时留下半个条目
+        with span("写入缓存", "write", file=entry.name) as current:
+            fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    json.dump(data, fh, ensure_ascii=False)
+                os.replace(tmp, entry)
+                current.add(bytes_written=os.path.getsize(entry))
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+        self.prune()
+
+    def entries(self) -> List[Path]:
+        if not self.root.exists():
+            return []
+        return list(self.root.glob("*/*.json"))
+
+    def total_bytes(self) -> int:
+        return sum(entry.stat().st_size for entry in self.entries())
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """按最近使用时间淘汰条目，直到总大小不超过上限；返回删除的条目数"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        stats = []
+        for entry in self.entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            stats.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in stats)
+        removed = 0
+        for _, size, entry in sorted(stats):
+            if total <= limit:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        return self.prune(max_bytes=0)
+
+
+def iter_pages_cached(
+    path: Union[str, Path],
+    cache: Optional[ExtractionCache] = None,
+    dpi: int = DEFAULT_DPI,
+    lang: str = DEFAULT_LANG,
+    min_text_chars: int = MIN_TEXT_CHARS,
+    **kwargs,
+) -> Iterator[PageText]:
+    """带缓存的 :func:`suitagent.ingest.iter_pages`
+
+    命中时直接返回缓存的页面；未命中时边解析边产出，完整读完后写入缓存。
+    """
+    cache = cache or ExtractionCache()
+    stage = start_span("文档解析", "stage", file=Path(path).name)
+    stage.add(bytes_read=os.path.getsize(path))
+    try:
+        key = cache.make_key(file_digest(path), dpi=dpi, lang=lang, min_text_chars=min_text_chars)
+        cached = cache.get(key)
+        if cached is not None:
+            stage.add(cache_hits=1).set(pages=len(cached))
+            yield from cached
+            return
+
+        stage.add(cache_misses=1)
+        pages = []
+        for page in iter_pages(path, dpi=dpi, lang=lang, min_text_chars=min_text_chars, **kwargs):
+            pages.append(page)
+            yield page
+        # 缓存写入归入本次解析，而不是挂在调用方的 span 下
+        with activate(stage):
+            cache.put(key, pages, source_path=str(path))
+        stage.set(pages=len(pages), ocr_pages=sum(page.source == "ocr" for page in pages))
+    finally:
+        stage.end()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="查看和清理文档解析缓存")
+    parser.add_argument("--dir", default=str(DEFAULT_CACHE_DIR), help="缓存目录")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="显示缓存条目数和总大小")
+    sub.add_parser("list", help="按最近使用时间列出缓存条目")
+    prune = sub.add_parser("prune", help="淘汰最久未用的条目，直到不超过指定大小")
+    prune.add_argument("--max-size", default="1G", help="大小上限，如 500M、2G")
+    sub.add_parser("clear", help="清空缓存")
+    args = parser.parse_args(argv)
+
+    cache = ExtractionCache(args.dir)
+
+    if args.command == "stats":
+        entries = cache.entries()
+        print(f"缓存目录: {cache.root}")
+        print(f"条目数:   {len(entries)}")
+        print(f"总大小:   {format_size(cache.total_bytes())}")
+    elif args.command == "list":
+        rows = []
+        for entry in cache.entries():
+            try:
+                with open(entry, encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            rows.append((entry.stat().st_mtime, entry.stat().st_size, data))
+        for mtime, size, data in sorted(rows, key=lambda row: row[0], reverse=True):
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime))
+            print(f"{used}  {format_size(size):>10}  {data['page_count']:>4}页"
+                  f"（OCR {data['ocr_pages']}）  {data['source_path'] or data['key']}")
+    elif args.command == "prune":
+        removed = cache.prune(parse_size(args.max_size))
+        print(f"已删除 {removed} 个条目，当前大小 {format_size(cache.total_bytes())}")
+    elif args.command == "clear":
+        removed = cache.clear()
+        print(f"已清空 {removed} 个条目")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""本地文书类型识别
+
+按 README「自动识别规则」表，用多模式关键词匹配（Aho–Corasick 自动机）加权打分，
+在本地确定文书类型、自动场景和建议工作流，无需大模型往返。
+只扫描文本前 ``DEFAULT_SCAN_CHARS`` 个字符；当最高分过低、与次高分拉不开差距，
+或者没有命中该类型的决定性关键词（只靠「原告」「此致」等通用词）时，判定为低置信度，
+此时才交给大模型（``fallback``）识别。并列第一时不作猜测，返回「未识别」。
+
+用法：
+    python -m suitagent.classifier input/起诉状.pdf
+    python -m suitagent.classifier --no-llm input/*.pdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .trace import span
+
+DEFAULT_SCAN_CHARS = 8 * 1024
+
+# 最高分低于该值，或 (最高分 - 次高分) / 最高分 低于置信度阈值时，视为低置信度
+MIN_SCORE = 4.0
+MIN_CONFIDENCE = 0.3
+
+# 权重不低于该值的关键词（如「起诉状」「证据目录」「判决如下」）能单独确定文书类型；
+# 一个都没有命中时，仅凭「原告」「此致」这类通用词只作低置信度猜测
+DEFINING_WEIGHT = 4
+
+# 同一关键词最多计分次数，避免「原告」「被告」这类高频词淹没其他特征
+MAX_HITS_PER_KEYWORD = 3
+
+UNKNOWN = "未识别"
+
+# 工作流中的每一步是一组可并行执行的 Agent
+Workflow = Tuple[Tuple[str, ...], ...]
+
+
+@dataclass(frozen=True)
+class DocumentRule:
+    document_type: str
+    scenario: str
+    workflow: Workflow
+    keywords: Dict[str, float]
+    # 命中时从得分中扣除，用于区分格式相近的文书（如答辩状之于起诉状）
+    negatives: Dict[str, float] = field(default_factory=dict)
+
+    def defined_by(self, counts: Dict[str, int]) -> bool:
+        return any(counts.get(word) for word, weight in self.keywords.items() if weight >= DEFINING_WEIGHT)
+
+
+RULES: Tuple[DocumentRule, ...] = (
+    DocumentRule(
+        "起诉状",
+        "被告应诉",
+        (("DocAnalyzer",), ("IssueIdentifier",), ("Researcher",), ("Strategist",), ("Writer",)),
+        {"起诉状": 6, "诉讼请求": 3, "事实与理由": 3, "事实和理由": 3, "原告": 1, "被告": 1, "此致": 1},
+        {"答辩状": 6, "答辩人": 5, "答辩意见": 3},
+    ),
+    DocumentRule(
+        "证据材料",
+        "证据质证",
+        (("DocAnalyzer", "EvidenceAnalyzer"), ("Researcher",), ("Writer",)),
+        {"证据目录": 6, "证据清单": 6, "证明目的": 4, "证明内容": 3, "证据": 1, "附件": 1, "证明": 1},
+    ),
+    DocumentRule(
+        "庭审笔录",
+        "庭审后分析",
+        (("DocAnalyzer",), ("EvidenceAnalyzer",), ("Strategist",)),
+        {"庭审笔录": 6, "开庭笔录": 6, "庭审": 2, "审判员": 2, "书记员": 2, "当事人": 1, "问：": 1, "答：": 1},
+    ),
+    DocumentRule(
+        "判决书",
+        "判决分析",
+        (("DocAnalyzer",), ("IssueIdentifier",), ("Researcher",)),
+        {"判决书": 6, "裁定书": 6, "判决如下": 5, "裁定如下": 5, "本院认为": 4, "法院认为": 3, "判决": 1, "裁定": 1},
+    ),
+    DocumentRule(
+        "律师函",
+        "法律催告",
+        (("DocAnalyzer",), ("Strategist",), ("Writer",)),
+        {"律师函": 6, "催告函": 6, "特此函告": 4, "委托": 1},
+    ),
+)
+
+RULES_BY_TYPE: Dict[str, DocumentRule] = {rule.document_type: rule for rule in RULES}
+
+
+class KeywordMatcher:
+    """Aho–Corasick 多模式匹配：一次扫描统计所有关键词的出现次数"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for word in keywords:
+            self._add(word)
+        self._build()
+
+    def _add(self, word: str) -> None:
+        state = 0
+        for char in word:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(word)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def count(self, text: str) -> Dict[str, int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        counts: Dict[str, int] = {}
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word in out[state]:
+                counts[word] = counts.get(word, 0) + 1
+        return counts
+
+
+_MATCHER = KeywordMatcher({word for rule in RULES for word in (*rule.keywords, *rule.negatives)})
+
+
+@dataclass
+class Classification:
+    document_type: str
+    scenario: str
+    workflow: Workflow
+    confidence: float
+    scores: Dict[str, float] = field(default_factory=dict)
+    source: str = "rules"  # "rules" 或 "llm"
+
+    @property
+    def workflow_text(self) -> str:
+        """按 README 的写法展示工作流，如 ``DocAnalyzer + EvidenceAnalyzer → Researcher``"""
+        return " → ".join(" + ".join(step) for step in self.workflow)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {
+            "document_type": self.document_type,
+            "scenario": self.scenario,
+            "workflow": self.workflow_text,
+            "confidence": f"{self.confidence:.2f}",
+            "source": self.source,
+        }
+
+
+def _weighted(counts: Dict[str, int], keywords: Dict[str, float]) -> float:
+    return sum(weight * min(counts.get(word, 0), MAX_HITS_PER_KEYWORD) for word, weight in keywords.items())
+
+
+def _scores(counts: Dict[str, int]) -> Dict[str, float]:
+    return {
+        rule.document_type: max(0.0, _weighted(counts, rule.keywords) - _weighted(counts, rule.negatives))
+        for rule in RULES
+    }
+
+
+def score(text: str, scan_chars: int = DEFAULT_SCAN_CHARS) -> Dict[str, float]:
+    """按文书类型计算关键词加权得分（扣除反向关键词，不低于 0）"""
+    return _scores(_MATCHER.count(text[:scan_chars]))
+
+
+def classify_text(
+    text: str,
+    fallback: Optional[Callable[[str], Dict[str, str]]] = None,
+    scan_chars: int = DEFAULT_SCAN_CHARS,
+) -> Classification:
+    """识别文书类型
+
+    Args:
+        text: 文档文本（只使用前 ``scan_chars`` 个字符）
+        fallback: 低置信度时调用的大模型识别函数，返回含 ``document_type``、
+            ``scenario`` 的字典；为 None，或大模型也未能识别时，返回规则结果
+        scan_chars: 扫描的字符数
+    """
+    with span("文书识别", "stage") as current:
+        result = _classify_text(text, fallback, scan_chars)
+        current.set(document_type=result.document_type, source=result.source)
+    return result
+
+
+def _classify_text(
+    text: str,
+    fallback: Optional[Callable[[str], Dict[str, str]]],
+    scan_chars: int,
+) -> Classification:
+    counts = _MATCHER.count(text[:scan_chars])
+    scores = _scores(counts)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best_type, best), (_, second) = ranked[0], ranked[1]
+    confidence = (best - second) / best if best > 0 else 0.0
+    # 没有命中任何决定性关键词时，分差再大也只是通用词堆出来的
+    defined = RULES_BY_TYPE[best_type].defined_by(counts)
+
+    if best >= MIN_SCORE and confidence >= MIN_CONFIDENCE and defined:
+        rule = RULES_BY_TYPE[best_type]
+        return Classification(rule.document_type, rule.scenario, rule.workflow, confidence, scores)
+
+    label = fallback(text[:scan_chars]) if fallback is not None else {}
+    # 大模型调用失败（如未安装 CLI）时返回「未识别」，此时保留规则的最佳猜测
+    if label.get("document_type") not in (None, "", UNKNOWN):
+        rule = RULES_BY_TYPE.get(label["document_type"])
+        return Classification(
+            label["document_type"],
+            label.get("scenario", rule.scenario if rule else UNKNOWN),
+            rule.workflow if rule else (("DocAnalyzer",),),
+            confidence,
+            scores,
+            source="llm",
+        )
+
+    # 并列第一时 sorted 会落到排在前面的规则上，不能当作猜测
+    if best > second:
+        rule = RULES_BY_TYPE[best_type]
+        return Classification(rule.document_type, rule.scenario, rule.workflow, confidence, scores)
+    return Classification(UNKNOWN, UNKNOWN, (("DocAnalyzer",),), 0.0, scores)
+
+
+def classify_file(
+    path: Path,
+    fallback: Optional[Callable[[str], Dict[str, str]]] = None,
+    scan_chars: int = DEFAULT_SCAN_CHARS,
+) -> Classification:
+    """流式读取文档，凑够 ``scan_chars`` 个字符即停止解析并识别"""
+    from .cache import iter_pages_cached
+
+    parts: List[str] = []
+    size = 0
+    pages = iter_pages_cached(path)
+    try:
+        for page in pages:
+            parts.append(page.text)
+            size += len(page.text)
+            if size >= scan_chars:
+                break
+    finally:
+        pages.close()
+    return classify_text("\n".join(parts), fallback=fallback, scan_chars=scan_chars)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="按自动识别规则判断文书类型和工作流")
+    parser.add_argument("paths", nargs="+", help="待识别文档")
+    parser.add_argument("--scan-chars", type=int, default=DEFAULT_SCAN_CHARS, help="扫描的字符数")
+    parser.add_argument("--no-llm", action="store_true", help="低置信度时也不调用大模型")
+    args = parser.parse_args(argv)
+
+    fallback = None
+    if not args.no_llm:
+        from .batch import llm_classify as fallback
+
+    for path in args.paths:
+        result = classify_file(Path(path), fallback=fallback, scan_chars=args.scan_chars)
+        print(f"{path}: {result.document_type}（{result.scenario}，置信度 {result.confidence:.2f}，"
+              f"{result.source}）\n  {result.workflow_text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,606 @@
+"""Scheduler 期限计算引擎
+
+根据各案件 ``06_日程管理/期限事件.csv`` 中登记的起算事件（送达、判决生效等），
+按内置的法定期间规则确定性地计算届满日，不再由大模型逐案推算。
+
+- 法院工作日历预先计算为 NumPy 数组（是否工作日、下一工作日、累计工作日），
+  法定节假日与调休安排见 ``data/holidays.yaml``；
+- 所有案件的期限一次性向量化计算：按日、月、年加期间，届满日遇节假日顺延，
+  再统计剩余工作日并分级提醒；
+- 每个案件输出 ``期限提醒.md`` 与 ``期限提醒.xlsx``（届满日、提醒级别与工时统计），
+  只在登记文件或提醒级别变化时重写，因此不含逐日变化的剩余天数；
+- ``output/`` 下另生成全所 ``期限总览.md``（只列未办结事项，含剩余天数、剩余工作日），
+  每次批处理后更新；``期限总览.xlsx`` 较慢，只在直接运行本模块时生成。
+
+期限事件.csv 的列：事件、起算日，可选 期间（如「15日」「6个月」，事件为内置规则时可省略）、
+完成（填「是」表示已办结）、备注。工时记录.csv 的列：日期、人员、工作内容、工时。
+
+用法：
+    python -m suitagent.deadlines
+    python -m suitagent.deadlines --output output --today 2026-10-17
+    python -m suitagent.deadlines --rules
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .batch import CASE_DIRS
+from .trace import span, tracing, write_text
+
+SCHEDULE_DIR = CASE_DIRS[5]
+EVENTS_FILE = "期限事件.csv"
+HOURS_FILE = "工时记录.csv"
+REPORT_NAME = "期限提醒"
+BOARD_NAME = "期限总览"
+STATE_FILE = ".deadlines_state.json"
+STATE_VERSION = 2
+
+HOLIDAYS_FILE = Path(__file__).resolve().parent / "data" / "holidays.yaml"
+
+# 日历覆盖范围；诉讼时效、申请执行期间均以年计，留足余量
+CALENDAR_START = np.datetime64("2000-01-01", "D")
+CALENDAR_END = np.datetime64("2061-01-01", "D")
+
+# 剩余工作日不超过该值时提醒
+URGENT_WORKDAYS = 3
+SOON_WORKDAYS = 7
+
+OVERDUE, URGENT, SOON, NORMAL, DONE, INVALID = "已逾期", "紧急", "临近", "正常", "已完成", "待补充"
+STATUS_ORDER = (OVERDUE, URGENT, SOON, NORMAL, INVALID, DONE)
+
+EVENT_COLUMNS = ("案件", "事件", "起算日", "期间", "完成", "备注")
+HOURS_COLUMNS = ("案件", "日期", "人员", "工作内容", "工时")
+RESULT_COLUMNS = ("案件", "事件", "起算日", "期间", "届满日", "剩余天数", "剩余工作日", "状态", "依据", "备注")
+
+_PERIOD_RE = r"(?P<amount>\d+)\s*(?P<unit>日|天|个月|月|年)"
+_UNITS = {"日": "日", "天": "日", "个月": "月", "月": "月", "年": "年"}
+
+
+@dataclass(frozen=True)
+class DeadlineRule:
+    event: str
+    amount: int
+    unit: str  # "日"、"月" 或 "年"
+    basis: str
+
+    @property
+    def period(self) -> str:
+        return f"{self.amount}{'个月' if self.unit == '月' else self.unit}"
+
+
+# 起算事件 → 法定期间（条文序号依 2023 年修正的民事诉讼法）
+RULES: Tuple[DeadlineRule, ...] = (
+    DeadlineRule("答辩期", 15, "日", "民事诉讼法第一百二十八条"),
+    DeadlineRule("管辖权异议", 15, "日", "民事诉讼法第一百三十条"),
+    DeadlineRule("举证期限", 15, "日", "民诉法解释第九十九条"),
+    DeadlineRule("上诉期（判决）", 15, "日", "民事诉讼法第一百七十一条"),
+    DeadlineRule("上诉期（裁定）", 10, "日", "民事诉讼法第一百七十一条"),
+    DeadlineRule("诉前保全后起诉", 30, "日", "民事诉讼法第一百零四条"),
+    DeadlineRule("申请再审", 6, "月", "民事诉讼法第二百一十六条"),
+    DeadlineRule("申请执行", 2, "年", "民事诉讼法第二百五十条"),
+    DeadlineRule("诉讼时效", 3, "年", "民法典第一百八十八条"),
+)
+
+RULES_BY_EVENT: Dict[str, DeadlineRule] = {rule.event: rule for rule in RULES}
+
+
+def _as_days(dates) -> np.ndarray:
+    return np.asarray(dates, dtype="datetime64[D]")
+
+
+def _date_list(values: Iterable) -> List[np.datetime64]:
+    """把 YAML 中的单个日期或 [起, 止] 区间展开为日期列表"""
+    days: List[np.datetime64] = []
+    for value in values or ():
+        if isinstance(value, (list, tuple)):
+            start, end = value
+            days.extend(np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1))
+        else:
+            days.append(np.datetime64(value, "D"))
+    return days
+
+
+class CourtCalendar:
+    """预计算的法院工作日历
+
+    数组下标为距 ``CALENDAR_START`` 的天数：
+
+    - ``workday``：是否工作日（周一至周五，去掉法定节假日，加上调休上班日）；
+    - ``next_workday``：当日或其后第一个工作日的下标，用于届满日顺延；
+    - ``workday_count``：截至当日（含）的累计工作日数，相减即得区间内的工作日数。
+    """
+
+    def __init__(self, holidays: Sequence = (), workdays: Sequence = (), years: Iterable[int] = ()):
+        days = np.arange(CALENDAR_START, CALENDAR_END)
+        # 1970-01-01 是星期四，换算为周一为 0
+        weekday = (days.astype("int64") + 3) % 7
+        self.workday = weekday < 5
+        self.workday[self.index(_as_days(holidays))] = False
+        self.workday[self.index(_as_days(workdays))] = True
+        self.years = frozenset(years)
+
+        positions = np.arange(len(days))
+        candidates = np.where(self.workday, positions, len(days) - 1)
+        self.next_workday = np.minimum.accumulate(candidates[::-1])[::-1]
+        self.workday_count = np.cumsum(self.workday)
+
+    @classmethod
+    def load(cls, path: Path = HOLIDAYS_FILE) -> "CourtCalendar":
+        import yaml
+
+        with open(path, encoding="utf-8") as fh:
+            data = yaml.safe_load(fh) or {}
+        holidays: List[np.datetime64] = []
+        workdays: List[np.datetime64] = []
+        for year in data.values():
+            holidays.extend(_date_list(year.get("holidays")))
+            workdays.extend(_date_list(year.get("workdays")))
+        return cls(holidays, workdays, (int(year) for year in data))
+
+    def index(self, dates) -> np.ndarray:
+        offsets = (_as_days(dates) - CALENDAR_START).astype("int64")
+        if offsets.size and (offsets.min() < 0 or offsets.max() >= len(self.workday)):
+            raise ValueError(f"日期超出日历范围 {CALENDAR_START} ~ {CALENDAR_END - 1}")
+        return offsets
+
+    def is_workday(self, dates) -> np.ndarray:
+        return self.workday[self.index(dates)]
+
+    def roll_forward(self, dates) -> np.ndarray:
+        """届满日遇休息日或法定节假日时顺延至其后第一个工作日"""
+        return CALENDAR_START + self.next_workday[self.index(dates)]
+
+    def workdays_between(self, start, end) -> np.ndarray:
+        """``start``（不含）至 ``end``（含）之间的工作日数，``end`` 早于 ``start`` 时为负"""
+        return self.workday_count[self.index(end)] - self.workday_count[self.index(start)]
+
+    def covers(self, dates) -> np.ndarray:
+        """对应年度的节假日安排是否已录入"""
+        years = _as_days(dates).astype("datetime64[Y]").astype("int64") + 1970
+        return np.isin(years, list(self.years))
+
+
+@lru_cache(maxsize=None)
+def load_calendar(path: str = str(HOLIDAYS_FILE)) -> CourtCalendar:
+    return CourtCalendar.load(Path(path))
+
+
+def add_periods(start, amount, unit) -> np.ndarray:
+    """计算期间的最后一日（民法典第二百零一条、第二百零二条）
+
+    起算日不计入；按月、年计算的，到期月的对应日为最后一日，没有对应日的取月末。
+    """
+    start = _as_days(start)
+    amount = np.asarray(amount, dtype="int64")
+    unit = np.asarray(unit)
+    months = np.where(unit == "年", amount * 12, np.where(unit == "月", amount, 0))
+
+    month = start.astype("datetime64[M]")
+    day = (start - month.astype("datetime64[D]")).astype("int64")
+    target = month + months
+    month_days = ((target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")).astype("int64")
+    by_month = target.astype("datetime64[D]") + np.minimum(day, month_days - 1)
+    return np.where(unit == "日", start + amount, by_month)
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """支持 2026-10-17、2026/10/17、2026年10月17日 等写法"""
+    text = values.fillna("").astype(str).str.strip()
+    text = text.str.replace(r"[年/.]", "-", regex=True).str.replace("月", "-").str.replace("日", "")
+    return pd.to_datetime(text, format="%Y-%m-%d", errors="coerce")
+
+
+def compute(events: pd.DataFrame, today: Optional[dt.date] = None,
+            calendar: Optional[CourtCalendar] = None) -> pd.DataFrame:
+    """一次性计算所有案件的期限
+
+    Args:
+        events: 含 ``EVENT_COLUMNS`` 各列的事件表，可来自多个案件
+        today: 计算基准日，默认今天
+        calendar: 工作日历，默认读取 ``data/holidays.yaml``
+    """
+    calendar = calendar or load_calendar()
+    today64 = np.datetime64(today or dt.date.today(), "D")
+    events = events.reindex(columns=EVENT_COLUMNS).fillna("")
+    n = len(events)
+
+    rules = events["事件"].map({rule.event: rule.period for rule in RULES})
+    period = events["期间"].astype(str).str.strip().where(lambda s: s != "", rules).fillna("")
+    # 期间写法种类很少，只解析去重后的值
+    codes, uniques = pd.factorize(period)
+    parsed = pd.Series(uniques, dtype=object).str.extract(_PERIOD_RE).iloc[codes].reset_index(drop=True)
+    start = _parse_dates(events["起算日"])
+    valid = (start.notna() & parsed["amount"].notna()).to_numpy().copy()
+
+    start_days = start.to_numpy(dtype="datetime64[D]")
+    amount = parsed["amount"].fillna(0).astype("int64").to_numpy()
+    unit = parsed["unit"].map(_UNITS).fillna("日").to_numpy()
+
+    due = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+    days_left = np.zeros(n, dtype="int64")
+    workdays_left = np.zeros(n, dtype="int64")
+    notes = events["备注"].astype(str).to_numpy(dtype=object)
+
+    if valid.any():
+        # 超出日历范围的按无法识别处理，不影响其他案件
+        last_day = add_periods(start_days[valid], amount[valid], unit[valid])
+        in_range = (start_days[valid] >= CALENDAR_START) & (last_day < CALENDAR_END)
+        valid[valid] = in_range
+        last_day = last_day[in_range]
+
+    if valid.any():
+        rolled = calendar.roll_forward(last_day)
+        due[valid] = rolled
+        days_left[valid] = (rolled - today64).astype("int64")
+        workdays_left[valid] = calendar.workdays_between(np.full(len(rolled), today64), rolled)
+
+        rolled_notes = np.where(rolled != last_day, "届满日逢休息日、节假日，已顺延", "")
+        uncovered = ~(calendar.covers(last_day) & calendar.covers(rolled))
+        uncovered_notes = np.where(uncovered, "该年度节假日安排未录入，仅按周末顺延", "")
+        notes[valid] = ["；".join(part for part in parts if part)
+                        for parts in zip(notes[valid], rolled_notes, uncovered_notes)]
+
+    done = events["完成"].astype(str).str.strip().isin(["是", "已完成", "Y", "y", "1", "true", "True"]).to_numpy()
+    status = np.select(
+        [done, ~valid, days_left < 0, workdays_left <= URGENT_WORKDAYS, workdays_left <= SOON_WORKDAYS],
+        [DONE, INVALID, OVERDUE, URGENT, SOON],
+        NORMAL,
+    )
+    notes[~valid & ~done] = "起算日或期间无法识别"
+
+    result = pd.DataFrame({
+        "案件": events["案件"].to_numpy(),
+        "事件": events["事件"].to_numpy(),
+        "起算日": start.dt.date.to_numpy(),
+        "期间": period.to_numpy(),
+        "届满日": pd.Series(due).dt.date.to_numpy(),
+        "剩余天数": pd.Series(days_left).where(valid).astype("Int64").array,
+        "剩余工作日": pd.Series(workdays_left).where(valid).astype("Int64").array,
+        "状态": status,
+        "依据": events["事件"].map({rule.event: rule.basis for rule in RULES}).fillna("").to_numpy(),
+        "备注": notes,
+    })
+    result["状态"] = pd.Categorical(result["状态"], categories=STATUS_ORDER, ordered=True)
+    return result.sort_values(["状态", "届满日", "案件"], kind="stable", na_position="last").reset_index(drop=True)
+
+
+def summarize_hours(hours: pd.DataFrame) -> pd.DataFrame:
+    """按案件、人员汇总工时"""
+    hours = hours.reindex(columns=HOURS_COLUMNS)
+    hours = hours.assign(工时=pd.to_numeric(hours["工时"], errors="coerce").fillna(0.0))
+    return (
+        hours.groupby(["案件", "人员"], sort=True)["工时"]
+        .agg(["sum", "count"])
+        .rename(columns={"sum": "工时", "count": "记录数"})
+        .reset_index()
+    )
+
+
+# ---------------------------------------------------------------------------
+# 读写
+# ---------------------------------------------------------------------------
+
+
+def _read_rows(path: str, case_id: str, columns: Sequence[str]) -> List[list]:
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as fh:
+            reader = csv.reader(fh)
+            header = [name.strip() for name in next(reader, [])]
+            positions = [header.index(col) if col in header else None for col in columns[1:]]
+            return [
+                [case_id] + [row[i].strip() if i is not None and i < len(row) else "" for i in positions]
+                for row in reader if row
+            ]
+    except FileNotFoundError:
+        return []
+
+
+def _scan(output_dir: Path) -> List[Tuple[Path, List[int]]]:
+    """含日程管理登记文件的案件目录，及期限事件、工时记录的修改时间（不存在为 0）
+
+    数千个案件时 pathlib 的开销不可忽略，这里直接用 ``os.scandir``、``os.stat``。
+    """
+    found = []
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            stamp = []
+            for name in (EVENTS_FILE, HOURS_FILE):
+                try:
+                    stamp.append(os.stat(os.path.join(entry.path, SCHEDULE_DIR, name)).st_mtime_ns)
+                except FileNotFoundError:
+                    stamp.append(0)
+            if any(stamp):
+                found.append((Path(entry.path), stamp))
+    return sorted(found)
+
+
+def case_dirs(output_dir: Path) -> List[Path]:
+    """含日程管理登记文件的案件目录"""
+    return [path for path, _ in _scan(output_dir)]
+
+
+def _read_case(case_dir: Path) -> Tuple[List[list], List[list]]:
+    schedule = os.path.join(case_dir, SCHEDULE_DIR)
+    return (_read_rows(os.path.join(schedule, EVENTS_FILE), case_dir.name, EVENT_COLUMNS),
+            _read_rows(os.path.join(schedule, HOURS_FILE), case_dir.name, HOURS_COLUMNS))
+
+
+def _frames(events: List[list], hours: List[list]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    return pd.DataFrame(events, columns=EVENT_COLUMNS), pd.DataFrame(hours, columns=HOURS_COLUMNS)
+
+
+def load(cases: Iterable[Path]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """读取各案件的期限事件与工时记录，合并为两张表"""
+    events: List[list] = []
+    hours: List[list] = []
+    for case_dir in cases:
+        case_events, case_hours = _read_case(case_dir)
+        events.extend(case_events)
+        hours.extend(case_hours)
+    return _frames(events, hours)
+
+
+Rows = List[tuple]
+
+
+def _records(frame: pd.DataFrame, columns: Sequence[str]) -> Rows:
+    """一次性转为 Python 元组（缺失值为 None），逐案件输出时不再付出 pandas 的开销"""
+    values = frame[list(columns)].astype(object)
+    return list(values.where(values.notna(), None).itertuples(index=False, name=None))
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def _markdown_table(columns: Sequence[str], rows: Rows) -> List[str]:
+    lines = ["| " + " | ".join(columns) + " |", "|" + "------|" * len(columns)]
+    lines.extend("| " + " | ".join(_cell(value) for value in row) + " |" for row in rows)
+    return lines
+
+
+def _status_summary(statuses: Iterable[str]) -> str:
+    counts = Counter(statuses)
+    return "，".join(f"{status} {counts[status]} 项" for status in STATUS_ORDER if counts[status])
+
+
+def _render_markdown(title: str, note: str, columns: Sequence[str], rows: Rows,
+                     hour_columns: Sequence[str], hour_rows: Rows) -> str:
+    status = columns.index("状态")
+    lines = [
+        f"# {title}",
+        "",
+        f"> 由 `suitagent.deadlines` 自动生成，{note}"
+        "期间开始的当日不计入，届满日为休息日或法定节假日的，顺延至其后第一个工作日。",
+        "",
+    ]
+    if rows:
+        lines += [f"共 {len(rows)} 项：{_status_summary(row[status] for row in rows)}。", ""]
+        lines.extend(_markdown_table(columns, rows))
+    else:
+        lines.append("暂无登记的期限事件。")
+    if hour_rows:
+        total = sum(row[hour_columns.index("工时")] for row in hour_rows)
+        lines += ["", "## 工时统计", ""]
+        lines.extend(_markdown_table(hour_columns, hour_rows))
+        lines += ["", f"合计 {total:g} 小时。"]
+    return "\n".join(lines) + "\n"
+
+
+def _write_xlsx(path: Path, sheets: Dict[str, Tuple[Sequence[str], Rows]]) -> None:
+    from openpyxl import Workbook
+
+    # 只写模式逐行流式输出；日期单元格由 openpyxl 自动设为 yyyy-mm-dd 格式
+    workbook = Workbook(write_only=True)
+    for name, (columns, rows) in sheets.items():
+        sheet = workbook.create_sheet(name)
+        sheet.freeze_panes = "A2"
+        sheet.append(list(columns))
+        for row in rows:
+            sheet.append(row)
+    with span("写入", "write", file=path.name) as current:
+        tmp = path.with_name(f".{path.name}.tmp")
+        workbook.save(tmp)
+        os.replace(tmp, path)
+        current.add(bytes_written=os.path.getsize(path))
+
+
+# 剩余天数逐日变化，只出现在每次批处理都会更新的全所总览中；案件报告只在登记文件或
+# 提醒级别变化时重写，写入其中会过时
+COUNTDOWN_COLUMNS = ("剩余天数", "剩余工作日")
+CASE_COLUMNS = tuple(col for col in RESULT_COLUMNS[1:] if col not in COUNTDOWN_COLUMNS)
+CASE_HOUR_COLUMNS = ("人员", "工时", "记录数")
+BOARD_HOUR_COLUMNS = ("案件", "工时")
+CASE_NOTE = "提醒级别随每次批处理更新，剩余天数见全所期限总览。"
+
+
+def write_case_report(case_dir: Path, rows: Rows, hour_rows: Rows) -> None:
+    """写出案件的期限提醒；``rows``、``hour_rows`` 为去掉案件列的 ``CASE_COLUMNS``、``CASE_HOUR_COLUMNS`` 记录"""
+    schedule = case_dir / SCHEDULE_DIR
+    schedule.mkdir(parents=True, exist_ok=True)
+    with span("案件期限提醒", "stage", case=case_dir.name):
+        write_text(schedule / f"{REPORT_NAME}.md",
+                   _render_markdown(REPORT_NAME, CASE_NOTE, CASE_COLUMNS, rows, CASE_HOUR_COLUMNS, hour_rows))
+        sheets = {REPORT_NAME: (CASE_COLUMNS, rows)}
+        if hour_rows:
+            sheets["工时统计"] = (CASE_HOUR_COLUMNS, hour_rows)
+        _write_xlsx(schedule / f"{REPORT_NAME}.xlsx", sheets)
+
+
+def write_board(output_dir: Path, deadlines: pd.DataFrame, hours: pd.DataFrame, today: dt.date,
+                previous: str = "", xlsx: bool = False) -> str:
+    """写出全所期限总览（只列未办结事项），返回内容摘要
+
+    摘要直接由记录计算，与 ``previous`` 相同时不再渲染。XLSX 的逐单元格序列化是刷新中
+    最慢的一步，只在 ``xlsx`` 为真时写出；Markdown 更新而未写 XLSX 时删除旧的 XLSX，
+    避免两者内容不一致。
+    """
+    pending = deadlines[deadlines["状态"] != DONE]
+    totals = hours.groupby("案件", sort=True)["工时"].sum().reset_index()
+    digest = hashlib.blake2b(today.isoformat().encode("utf-8"), digest_size=16)
+    for frame in (pending, totals):
+        digest.update(pd.util.hash_pandas_object(frame.astype(str), index=False).to_numpy().tobytes())
+    digest = digest.hexdigest()
+    markdown = output_dir / f"{BOARD_NAME}.md"
+    workbook = output_dir / f"{BOARD_NAME}.xlsx"
+    changed = digest != previous or not markdown.exists()
+    if not changed and (not xlsx or workbook.exists()):
+        return digest
+
+    rows = _records(pending, RESULT_COLUMNS)
+    hour_rows = _records(totals, BOARD_HOUR_COLUMNS)
+    if changed:
+        note = f"计算基准日 {today.isoformat()}。"
+        write_text(markdown, _render_markdown(BOARD_NAME, note, RESULT_COLUMNS, rows, BOARD_HOUR_COLUMNS, hour_rows))
+    if xlsx and (changed or not workbook.exists()):
+        _write_xlsx(workbook, {BOARD_NAME: (RESULT_COLUMNS, rows), "工时汇总": (BOARD_HOUR_COLUMNS, hour_rows)})
+    elif changed and workbook.exists():
+        workbook.unlink()
+    return digest
+
+
+@dataclass
+class RefreshResult:
+    deadlines: pd.DataFrame
+    hours: pd.DataFrame
+    cases: int
+    written: int
+    compute_seconds: float
+    total_seconds: float
+
+
+def _load_state(path: Path) -> dict:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if state.get("version") == STATE_VERSION else {}
+
+
+def refresh(output_dir: Path, today: Optional[dt.date] = None, calendar: Optional[CourtCalendar] = None,
+            force: bool = False, board_xlsx: bool = False) -> RefreshResult:
+    """重算 ``output_dir`` 下全部案件的期限并写出报告
+
+    每次都重算全部期限，但登记文件未变化的案件直接使用状态文件中缓存的记录，不再读取。
+    案件报告只在登记文件变化、或其中某项期限的提醒级别变化（如由「正常」转为「临近」）
+    时重写；全所总览 Markdown 在内容变化时重写，XLSX 只在 ``board_xlsx`` 为真时写出。
+    数千个案件的日常刷新因此只需读写少数文件。
+
+    计算与各文件写入记入 ``output_dir/.trace.jsonl``（见 :mod:`suitagent.trace`）。
+    """
+    with tracing(output_dir, "期限刷新"):
+        return _refresh(output_dir, today, calendar, force, board_xlsx)
+
+
+def _refresh(output_dir: Path, today: Optional[dt.date], calendar: Optional[CourtCalendar],
+             force: bool, board_xlsx: bool) -> RefreshResult:
+    started = time.perf_counter()
+    today = today or dt.date.today()
+    scanned = _scan(output_dir)
+    state_path = output_dir / STATE_FILE
+    state = _load_state(state_path)
+    case_state: Dict[str, list] = state.get("cases", {})
+
+    events: List[list] = []
+    hours: List[list] = []
+    cached: Dict[str, list] = {}
+    for case_dir, mtimes in scanned:
+        entry = case_state.get(case_dir.name)
+        if entry and entry[:2] == mtimes:
+            case_events, case_hours = entry[3], entry[4]
+        else:
+            case_events, case_hours = _read_case(case_dir)
+        cached[case_dir.name] = [*mtimes, "", case_events, case_hours]
+        events.extend(case_events)
+        hours.extend(case_hours)
+    events_frame, hours_frame = _frames(events, hours)
+
+    computed = time.perf_counter()
+    with span("期限计算", "stage", cases=len(scanned), events=len(events_frame)):
+        deadlines = compute(events_frame, today, calendar)
+        hour_summary = summarize_hours(hours_frame)
+    compute_seconds = time.perf_counter() - computed
+
+    # 各案件的提醒级别签名
+    levels: Dict[str, str] = defaultdict(str)
+    for case_id, status in zip(deadlines["案件"].tolist(), deadlines["状态"].tolist()):
+        levels[case_id] += status
+    to_write = []
+    for case_dir, _ in scanned:
+        entry = cached[case_dir.name]
+        entry[2] = levels.get(case_dir.name, "")
+        if force or case_state.get(case_dir.name, [])[:3] != entry[:3] \
+                or not os.path.exists(os.path.join(case_dir, SCHEDULE_DIR, f"{REPORT_NAME}.md")):
+            to_write.append(case_dir)
+
+    if to_write:
+        names = {case_dir.name for case_dir in to_write}
+        case_rows: Dict[str, Rows] = defaultdict(list)
+        selected = deadlines[deadlines["案件"].isin(names)]
+        for case_id, row in zip(selected["案件"], _records(selected, CASE_COLUMNS)):
+            case_rows[case_id].append(row)
+        case_hours: Dict[str, Rows] = defaultdict(list)
+        selected = hour_summary[hour_summary["案件"].isin(names)]
+        for case_id, row in zip(selected["案件"], _records(selected, CASE_HOUR_COLUMNS)):
+            case_hours[case_id].append(row)
+        for case_dir in to_write:
+            write_case_report(case_dir, case_rows[case_dir.name], case_hours[case_dir.name])
+
+    board = write_board(output_dir, deadlines, hour_summary, today, "" if force else state.get("board", ""),
+                        xlsx=board_xlsx)
+    new_state = {"version": STATE_VERSION, "cases": cached, "board": board}
+    if new_state != state:
+        write_text(state_path, json.dumps(new_state, ensure_ascii=False))
+    return RefreshResult(deadlines, hour_summary, len(scanned), len(to_write), compute_seconds,
+                         time.perf_counter() - started)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="计算各案件法定期限并生成期限提醒与全所总览")
+    parser.add_argument("--output", default="output", help="案件输出目录")
+    parser.add_argument("--today", type=dt.date.fromisoformat, help="计算基准日（YYYY-MM-DD），默认今天")
+    parser.add_argument("--force", action="store_true", help="重写全部案件的期限提醒")
+    parser.add_argument("--rules", action="store_true", help="列出内置期限规则")
+    args = parser.parse_args(argv)
+
+    if args.rules:
+        for rule in RULES:
+            print(f"{rule.event}\t{rule.period}\t{rule.basis}")
+        return 0
+
+    output_dir = Path(args.output)
+    if not output_dir.is_dir():
+        print(f"{output_dir} 不存在", file=sys.stderr)
+        return 1
+    result = refresh(output_dir, args.today, force=args.force, board_xlsx=True)
+    pending = result.deadlines[result.deadlines["状态"].isin([OVERDUE, URGENT, SOON])]
+    for row in pending.itertuples(index=False):
+        print(f"[{row.状态}] {row.案件} {row.事件} 届满日 {row.届满日}（剩余 {row.剩余工作日} 个工作日）")
+    summary = _status_summary(result.deadlines["状态"]) or "无期限事件"
+    print(f"共 {result.cases} 个案件，{summary}；重写 {result.written} 份案件报告，"
+          f"耗时 {result.total_seconds:.2f}s（计算 {result.compute_seconds * 1000:.0f}ms）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
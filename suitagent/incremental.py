@@ -0,0 +1,422 @@
+"""增量分析：产出物依赖清单与脏节点规划
+
+每个 Agent 运行后，在 ``output/[案件编号]/.manifest.json`` 中登记它的产出文件，
+以及它读取的原始材料和上游产出物（均记录内容哈希）。再次运行工作流时，
+规划器对比当前哈希，只重算受影响的 Agent，并把互不依赖的 Agent 排在同一阶段并行执行。
+
+变化按文书类型传播：新增一份证据材料只会触发关心证据的 Agent
+（如 EvidenceAnalyzer），不会触发只看起诉状、判决书的 Researcher、IssueIdentifier。
+
+用法：
+    python -m suitagent.incremental plan output/案件A --scenario 证据质证
+    python -m suitagent.incremental record output/案件A --agent Researcher \\
+        --outputs 02_法律研究/法律研究报告.md --upstream 02_法律研究/争议焦点.md
+    python -m suitagent.incremental show output/案件A
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextvars
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set
+
+from .cache import file_digest
+from .classifier import RULES, UNKNOWN, classify_file
+from .trace import span, tracing
+
+MANIFEST_FILE = ".manifest.json"
+
+# 四层架构中各 Agent 的数据依赖（上游 Agent）
+AGENT_DEPENDENCIES: Dict[str, Sequence[str]] = {
+    "DocAnalyzer": (),
+    "EvidenceAnalyzer": ("DocAnalyzer",),
+    "IssueIdentifier": ("DocAnalyzer",),
+    "Researcher": ("IssueIdentifier",),
+    "Strategist": ("IssueIdentifier", "Researcher", "EvidenceAnalyzer"),
+    "Writer": ("Strategist", "Researcher", "EvidenceAnalyzer"),
+    "Summarizer": ("Writer", "Strategist", "EvidenceAnalyzer"),
+    "Reporter": ("Summarizer", "Writer", "Strategist", "Researcher", "EvidenceAnalyzer", "IssueIdentifier"),
+    "Scheduler": ("DocAnalyzer",),
+    "Reviewer": ("Writer", "Strategist"),
+}
+
+ALL_TYPES: FrozenSet[str] = frozenset([rule.document_type for rule in RULES] + [UNKNOWN])
+
+# 各 Agent 关心的文书类型；None 表示任何变化都需要重算
+AGENT_CONSUMES: Dict[str, Optional[FrozenSet[str]]] = {
+    "DocAnalyzer": None,
+    "EvidenceAnalyzer": frozenset({"证据材料", "庭审笔录"}),
+    "IssueIdentifier": frozenset({"起诉状", "判决书", "庭审笔录", "律师函", UNKNOWN}),
+    "Researcher": frozenset({"起诉状", "判决书", "律师函", UNKNOWN}),
+    "Strategist": None,
+    "Writer": None,
+    "Summarizer": None,
+    "Reporter": None,
+    "Scheduler": frozenset({"起诉状", "判决书", "庭审笔录"}),
+    "Reviewer": None,
+}
+
+# README「常见使用场景」中的 Agent 组合
+SCENARIO_AGENTS: Dict[str, Sequence[str]] = {
+    "被告应诉": ("DocAnalyzer", "IssueIdentifier", "Researcher", "Strategist", "Writer",
+                 "Reviewer", "Summarizer", "Reporter"),
+    "证据质证": ("DocAnalyzer", "EvidenceAnalyzer", "Researcher", "Writer", "Summarizer"),
+    "庭审后分析": ("DocAnalyzer", "EvidenceAnalyzer", "Strategist", "Summarizer", "Reporter"),
+    "原告起诉": ("DocAnalyzer", "IssueIdentifier", "Researcher", "EvidenceAnalyzer", "Writer",
+                 "Summarizer", "Reporter"),
+    "诉前咨询": ("DocAnalyzer", "IssueIdentifier", "Strategist", "Writer", "Summarizer"),
+    "判决分析": ("DocAnalyzer", "IssueIdentifier", "Researcher"),
+    "法律催告": ("DocAnalyzer", "Strategist", "Writer"),
+}
+
+
+def _relevant(agent: str, types: Iterable[str]) -> Set[str]:
+    consumes = AGENT_CONSUMES.get(agent)
+    return set(types) if consumes is None else set(types) & consumes
+
+
+def _combine(digests: Iterable[str]) -> str:
+    values = sorted(set(digests))
+    if len(values) == 1:
+        return values[0]
+    return hashlib.sha256("\n".join(values).encode()).hexdigest()
+
+
+class Manifest:
+    """案件目录下的产出物依赖清单"""
+
+    def __init__(self, case_dir: Path):
+        self.case_dir = Path(case_dir)
+        self.path = self.case_dir / MANIFEST_FILE
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            data = {}
+        # agents: {Agent: {"inputs": {路径: 哈希}, "upstream": {产出物: 哈希},
+        #                  "outputs": {产出物: 哈希}, "doc_types": [...], "recorded": 时间,
+        #                  "type_digests": {文书类型: 该类型原始材料的合并哈希},
+        #                  "upstream_types": {产出物: 登记时其产出者的 type_digests}}}
+        self.agents: Dict[str, dict] = data.get("agents", {})
+        # 原始材料哈希 → 文书类型，避免重复识别
+        self.input_types: Dict[str, str] = data.get("input_types", {})
+
+    def save(self) -> None:
+        self.case_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        data = {"agents": self.agents, "input_types": self.input_types}
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def artifact_hash(self, artifact: str) -> Optional[str]:
+        path = self.case_dir / artifact
+        return file_digest(path) if path.is_file() else None
+
+    def input_type(self, path: str, digest: str) -> str:
+        if digest not in self.input_types:
+            self.input_types[digest] = classify_file(Path(path)).document_type
+        return self.input_types[digest]
+
+    def artifact_types(self, artifact: str) -> Set[str]:
+        producer = self.producer(artifact)
+        if producer is None:
+            return set(ALL_TYPES)
+        return set(self.agents[producer].get("doc_types", ALL_TYPES))
+
+    def type_digests(self, artifact: str) -> Dict[str, str]:
+        producer = self.producer(artifact)
+        return dict(self.agents[producer].get("type_digests", {})) if producer else {}
+
+    def changed_types(self, agent: str, artifact: str) -> Set[str]:
+        """上游产出相对 ``agent`` 登记时发生变化所涉及的文书类型
+
+        对比产出者当前的 ``type_digests`` 与登记时的快照；找不到差异（产出被手工修改、
+        旧版清单没有快照）时，保守地返回产出者涉及的全部文书类型。
+        """
+        seen = self.agents[agent].get("upstream_types", {}).get(artifact)
+        current = self.type_digests(artifact)
+        if seen is not None:
+            changed = {t for t in set(seen) | set(current) if seen.get(t) != current.get(t)}
+            if changed:
+                return changed
+        return self.artifact_types(artifact)
+
+    def record(
+        self,
+        agent: str,
+        outputs: Iterable[str],
+        inputs: Iterable[str] = (),
+        upstream: Iterable[str] = (),
+    ) -> None:
+        """登记一次 Agent 运行：产出文件及其来源（产出物路径相对案件目录）"""
+        if agent not in AGENT_DEPENDENCIES:
+            raise ValueError(f"未知的 Agent: {agent}")
+        input_hashes = {str(path): file_digest(path) for path in inputs}
+        upstream_hashes = {artifact: self.artifact_hash(artifact) for artifact in upstream}
+        output_hashes = {artifact: self.artifact_hash(artifact) for artifact in outputs}
+        missing = [artifact for artifact, digest in output_hashes.items() if digest is None]
+        if missing:
+            raise FileNotFoundError(f"产出文件不存在: {', '.join(missing)}")
+
+        by_type: Dict[str, List[str]] = {}
+        for path, digest in sorted(input_hashes.items()):
+            by_type.setdefault(self.input_type(path, digest), []).append(f"{path}:{digest}")
+        doc_types = set(by_type)
+        type_digests = {t: hashlib.sha256("\n".join(entries).encode()).hexdigest() for t, entries in by_type.items()}
+
+        upstream_types = {artifact: self.type_digests(artifact) for artifact in upstream_hashes}
+        merged: Dict[str, List[str]] = {}
+        for artifact in upstream_hashes:
+            doc_types |= self.artifact_types(artifact)
+            for t, digest in upstream_types[artifact].items():
+                merged.setdefault(t, []).append(digest)
+        type_digests.update({t: _combine(digests) for t, digests in merged.items()})
+
+        self.agents[agent] = {
+            "inputs": input_hashes,
+            "upstream": upstream_hashes,
+            "outputs": output_hashes,
+            "doc_types": sorted(doc_types),
+            # 只保留本 Agent 关心的类型，无关材料的变化不会经由它传给下游
+            "type_digests": {t: d for t, d in type_digests.items() if _relevant(agent, [t])},
+            "upstream_types": upstream_types,
+            "recorded": time.time(),
+        }
+
+    def producer(self, artifact: str) -> Optional[str]:
+        for agent, record in self.agents.items():
+            if artifact in record.get("outputs", {}):
+                return agent
+        return None
+
+
+@dataclass
+class NodePlan:
+    agent: str
+    reasons: List[str] = field(default_factory=list)
+    doc_types: Set[str] = field(default_factory=set)
+    changed_inputs: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Plan:
+    stages: List[List[NodePlan]]
+    skipped: List[str]
+
+    @property
+    def steps(self) -> int:
+        return sum(len(stage) for stage in self.stages)
+
+
+def workflow_dag(agents: Sequence[str]) -> Dict[str, List[str]]:
+    """把全局依赖限制在给定的 Agent 子集上；不在子集中的上游向上穿透到其依赖"""
+    selected = set(agents)
+
+    def upstream(agent: str, seen: Set[str]) -> Set[str]:
+        result: Set[str] = set()
+        for dep in AGENT_DEPENDENCIES[agent]:
+            if dep in seen:
+                continue
+            seen.add(dep)
+            result |= {dep} if dep in selected else upstream(dep, seen)
+        return result
+
+    return {agent: sorted(upstream(agent, set())) for agent in agents}
+
+
+def _topological(dag: Dict[str, List[str]]) -> List[str]:
+    order: List[str] = []
+    visited: Set[str] = set()
+
+    def visit(agent: str) -> None:
+        if agent in visited:
+            return
+        visited.add(agent)
+        for dep in dag[agent]:
+            visit(dep)
+        order.append(agent)
+
+    for agent in dag:
+        visit(agent)
+    return order
+
+
+def plan(case_dir: Path, input_files: Iterable[Path], agents: Sequence[str]) -> Plan:
+    """计算需要重算的 Agent，并按依赖层级分组为可并行的阶段"""
+    manifest = Manifest(case_dir)
+    dag = workflow_dag(agents)
+    current = {str(path): file_digest(path) for path in input_files}
+    current_types = {path: manifest.input_type(path, digest) for path, digest in current.items()}
+
+    nodes: Dict[str, NodePlan] = {}
+    level: Dict[str, int] = {}
+    for agent in _topological(dag):
+        node = NodePlan(agent)
+        record = manifest.agents.get(agent)
+
+        if record is None:
+            node.reasons.append("尚未运行")
+            node.doc_types = set(current_types.values()) or set(ALL_TYPES)
+        else:
+            missing = [a for a in record["outputs"] if not (manifest.case_dir / a).is_file()]
+            if missing:
+                node.reasons.append(f"产出缺失: {', '.join(missing)}")
+                node.doc_types |= set(record.get("doc_types", ALL_TYPES))
+
+            if not dag[agent]:
+                # 入口节点直接读取原始材料
+                recorded = record["inputs"]
+                for path, digest in current.items():
+                    if recorded.get(path) != digest and _relevant(agent, [current_types[path]]):
+                        node.changed_inputs.append(path)
+                        node.doc_types.add(current_types[path])
+                for path in recorded:
+                    if path not in current:
+                        node.changed_inputs.append(path)
+                        node.doc_types |= set(record.get("doc_types", ALL_TYPES))
+                if node.changed_inputs:
+                    node.reasons.append(f"原始材料变化: {', '.join(node.changed_inputs)}")
+
+            for artifact, digest in record["upstream"].items():
+                if manifest.artifact_hash(artifact) != digest:
+                    # 只看自登记以来变化的文书类型：新增证据重跑了 DocAnalyzer，
+                    # 不会因此让只关心起诉状、判决书的 Researcher 变脏
+                    types = _relevant(agent, manifest.changed_types(agent, artifact))
+                    if types:
+                        node.reasons.append(f"上游产出已修改: {artifact}")
+                        node.doc_types |= types
+
+        for dep in dag[agent]:
+            if dep in nodes:
+                types = _relevant(agent, nodes[dep].doc_types)
+                if types:
+                    node.reasons.append(f"上游 {dep} 需重算（{'、'.join(sorted(types))}）")
+                    node.doc_types |= types
+
+        if node.reasons:
+            nodes[agent] = node
+            level[agent] = 1 + max((level[dep] for dep in dag[agent] if dep in level), default=-1)
+
+    stages: List[List[NodePlan]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for agent, node in nodes.items():
+        stages[level[agent]].append(node)
+    skipped = [agent for agent in agents if agent not in nodes]
+    return Plan(stages, skipped)
+
+
+# 执行函数：接收节点计划，返回该 Agent 写入的产出文件（相对案件目录）
+Runner = Callable[[NodePlan], List[str]]
+
+
+def run_plan(
+    case_dir: Path,
+    the_plan: Plan,
+    runner: Runner,
+    input_files: Iterable[Path],
+    max_workers: int = 4,
+) -> None:
+    """逐阶段执行计划，同一阶段内的 Agent 并行运行，完成后登记到清单
+
+    每个阶段和每个 Agent 的耗时、产出字节数记入案件目录的追踪文件（见 :mod:`suitagent.trace`）。
+    """
+    case_dir = Path(case_dir)
+    inputs = [str(path) for path in input_files]
+    agents = [node.agent for stage in the_plan.stages for node in stage] + the_plan.skipped
+    dag = workflow_dag(agents)
+
+    def run_node(node: NodePlan) -> List[str]:
+        with span(node.agent, "agent", reasons=node.reasons) as current:
+            produced = runner(node)
+            current.add(bytes_written=sum(
+                (case_dir / rel).stat().st_size for rel in produced if (case_dir / rel).is_file()
+            ))
+        return produced
+
+    with tracing(case_dir, "增量重算", skipped=the_plan.skipped):
+        for index, stage in enumerate(the_plan.stages, start=1):
+            with span(f"阶段 {index}", "stage", agents=[node.agent for node in stage]):
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    # 每个任务复制一份上下文，使 Agent 的 span 挂在本阶段下
+                    futures = [pool.submit(contextvars.copy_context().run, run_node, node) for node in stage]
+                    outputs = {node.agent: future.result() for node, future in zip(stage, futures)}
+                # 登记在主线程中串行进行，避免并发写清单
+                manifest = Manifest(case_dir)
+                for agent, produced in outputs.items():
+                    upstream = [a for dep in dag[agent] for a in manifest.agents.get(dep, {}).get("outputs", {})]
+                    manifest.record(agent, produced, inputs=inputs if not dag[agent] else (), upstream=upstream)
+                manifest.save()
+
+
+def _case_inputs(args) -> List[Path]:
+    if args.inputs:
+        return [Path(p) for p in args.inputs]
+    from .batch import group_cases
+
+    case_id = Path(args.case_dir).name
+    for case in group_cases(Path(args.input_dir)):
+        if case.case_id == case_id:
+            return case.files
+    return []
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="按产出物依赖清单规划增量重算")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_plan = sub.add_parser("plan", help="列出需要重算的 Agent 及并行阶段")
+    p_plan.add_argument("case_dir", help="案件输出目录，如 output/案件A")
+    group = p_plan.add_mutually_exclusive_group()
+    group.add_argument("--scenario", choices=sorted(SCENARIO_AGENTS), help="使用场景")
+    group.add_argument("--agents", nargs="+", choices=sorted(AGENT_DEPENDENCIES), help="自定义 Agent 组合")
+    p_plan.add_argument("--inputs", nargs="*", help="原始材料（默认按 batch 规则从输入目录分组）")
+    p_plan.add_argument("--input-dir", default="input", help="输入目录")
+
+    p_record = sub.add_parser("record", help="登记一次 Agent 运行的产出和来源")
+    p_record.add_argument("case_dir")
+    p_record.add_argument("--agent", required=True, choices=sorted(AGENT_DEPENDENCIES))
+    p_record.add_argument("--outputs", nargs="+", required=True, help="产出文件（相对案件目录）")
+    p_record.add_argument("--inputs", nargs="*", default=[], help="读取的原始材料")
+    p_record.add_argument("--upstream", nargs="*", default=[], help="读取的上游产出（相对案件目录）")
+
+    p_show = sub.add_parser("show", help="显示清单内容")
+    p_show.add_argument("case_dir")
+    args = parser.parse_args(argv)
+
+    case_dir = Path(args.case_dir)
+    if args.command == "plan":
+        agents = args.agents or SCENARIO_AGENTS[args.scenario or "被告应诉"]
+        result = plan(case_dir, _case_inputs(args), agents)
+        if not result.stages:
+            print("所有产出均为最新，无需重算")
+            return 0
+        for index, stage in enumerate(result.stages, start=1):
+            print(f"阶段 {index}（并行）: {' + '.join(node.agent for node in stage)}")
+            for node in stage:
+                for reason in node.reasons:
+                    print(f"  - {node.agent}: {reason}")
+        print(f"共 {result.steps} 步，跳过: {', '.join(result.skipped) or '无'}")
+    elif args.command == "record":
+        manifest = Manifest(case_dir)
+        manifest.record(args.agent, args.outputs, inputs=args.inputs, upstream=args.upstream)
+        manifest.save()
+        print(f"已登记 {args.agent} 的 {len(args.outputs)} 个产出")
+    elif args.command == "show":
+        manifest = Manifest(case_dir)
+        for agent, record in manifest.agents.items():
+            recorded = time.strftime("%Y-%m-%d %H:%M", time.localtime(record["recorded"]))
+            print(f"{agent}（{recorded}，{'、'.join(record['doc_types']) or '无类型'}）")
+            for artifact in record["outputs"]:
+                print(f"  → {artifact}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
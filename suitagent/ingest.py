@@ -0,0 +1,197 @@
+"""DocAnalyzer 输入层：流式逐页文档解析
+
+处理顺序：
+1. 先用 pdfplumber 提取文本层（电子版 PDF 直接得到文字）；
+2. 仅对没有文本层的页面（扫描件）提交到进程池做 OCR，
+   每个任务只栅格化单独一页，避免整本案卷一次性转成图片；
+3. 结果按页码顺序以生成器形式返回，待处理页数有上限，内存占用可控。
+
+用法：
+    python -m suitagent.ingest input/起诉状.pdf
+    python -m suitagent.ingest --no-cache input/起诉状.pdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Iterator, Optional, Tuple, Union
+
+# 解析器版本：提取逻辑变化时递增，供缓存等模块判断结果是否失效
+EXTRACTOR_VERSION = "1"
+
+PDF_SUFFIXES = {".pdf"}
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+TEXT_SUFFIXES = {".txt", ".md"}
+
+# 文本层字符数低于该值视为扫描页，需要 OCR
+MIN_TEXT_CHARS = 20
+DEFAULT_DPI = 300
+DEFAULT_LANG = "chi_sim+eng"
+
+
+@dataclass
+class PageText:
+    """单页解析结果"""
+
+    page_number: int  # 从 1 开始
+    text: str
+    source: str  # "text"（文本层）、"ocr" 或 "markitdown"
+
+
+def _ocr_pdf_page(path: str, page_number: int, dpi: int, lang: str) -> str:
+    """在子进程中栅格化并识别单页 PDF"""
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(path, dpi=dpi, first_page=page_number, last_page=page_number)
+    try:
+        return "\n".join(pytesseract.image_to_string(image, lang=lang) for image in images)
+    finally:
+        for image in images:
+            image.close()
+
+
+def _ocr_image(path: str, lang: str) -> str:
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return pytesseract.image_to_string(image, lang=lang)
+
+
+def _iter_pdf_pages(
+    path: Path,
+    ocr_workers: Optional[int],
+    max_pending: int,
+    dpi: int,
+    lang: str,
+    min_text_chars: int,
+) -> Iterator[PageText]:
+    import pdfplumber
+
+    # 队列元素：(页码, 已提取文本 或 OCR Future)
+    pending: Deque[Tuple[int, Union[str, "Future[str]"]]] = deque()
+    executor: Optional[ProcessPoolExecutor] = None
+
+    def drain_one() -> PageText:
+        page_number, item = pending.popleft()
+        if isinstance(item, str):
+            return PageText(page_number, item, "text")
+        return PageText(page_number, item.result(), "ocr")
+
+    try:
+        with pdfplumber.open(str(path)) as pdf:
+            for index, page in enumerate(pdf.pages, start=1):
+                text = page.extract_text() or ""
+                # 释放该页解析缓存，避免大文件逐页累积
+                page.close()
+
+                if len(text.strip()) >= min_text_chars:
+                    pending.append((index, text))
+                else:
+                    if executor is None:
+                        executor = ProcessPoolExecutor(max_workers=ocr_workers)
+                    pending.append((index, executor.submit(_ocr_pdf_page, str(path), index, dpi, lang)))
+
+                # 队首已就绪的页面立即产出；待处理页数达到上限时阻塞等待队首
+                while pending and (
+                    len(pending) >= max_pending
+                    or isinstance(pending[0][1], str)
+                    or pending[0][1].done()
+                ):
+                    yield drain_one()
+
+        while pending:
+            yield drain_one()
+    finally:
+        if executor is not None:
+            for _, item in pending:
+                if not isinstance(item, str):
+                    item.cancel()
+            executor.shutdown(wait=True)
+
+
+def iter_pages(
+    path: Union[str, Path],
+    ocr_workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+    dpi: int = DEFAULT_DPI,
+    lang: str = DEFAULT_LANG,
+    min_text_chars: int = MIN_TEXT_CHARS,
+) -> Iterator[PageText]:
+    """按页码顺序流式返回文档文本
+
+    Args:
+        path: 文档路径，支持 PDF、图片、纯文本，其他格式交给 markitdown 转换
+        ocr_workers: OCR 进程数，默认等于 CPU 核数
+        max_pending: 同时在途的最大页数（含已提取待产出的页），决定内存上限，
+            默认为 OCR 进程数的 2 倍
+        dpi: OCR 栅格化分辨率
+        lang: Tesseract 语言包
+        min_text_chars: 文本层少于该字符数的页面视为扫描页
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix in PDF_SUFFIXES:
+        workers = ocr_workers or os.cpu_count() or 1
+        yield from _iter_pdf_pages(
+            path,
+            ocr_workers=workers,
+            max_pending=max(1, max_pending or workers * 2),
+            dpi=dpi,
+            lang=lang,
+            min_text_chars=min_text_chars,
+        )
+    elif suffix in IMAGE_SUFFIXES:
+        yield PageText(1, _ocr_image(str(path), lang), "ocr")
+    elif suffix in TEXT_SUFFIXES:
+        yield PageText(1, path.read_text(encoding="utf-8", errors="replace"), "text")
+    else:
+        from markitdown import MarkItDown
+
+        result = MarkItDown().convert(str(path))
+        yield PageText(1, result.text_content, "markitdown")
+
+
+def extract_text(path: Union[str, Path], **kwargs) -> str:
+    """提取整份文档文本，页与页之间以换页符分隔"""
+    return "\f".join(page.text for page in iter_pages(path, **kwargs))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="流式解析 PDF/图片/Office 文档，按页输出文本")
+    parser.add_argument("path", help="待解析文档")
+    parser.add_argument("--workers", type=int, default=None, help="OCR 进程数（默认 CPU 核数）")
+    parser.add_argument("--max-pending", type=int, default=None, help="在途页数上限")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI, help="OCR 分辨率")
+    parser.add_argument("--lang", default=DEFAULT_LANG, help="Tesseract 语言包")
+    parser.add_argument("--no-cache", action="store_true", help="不读写解析缓存")
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        pages = iter_pages
+    else:
+        from .cache import iter_pages_cached as pages
+
+    for page in pages(
+        args.path,
+        ocr_workers=args.workers,
+        max_pending=args.max_pending,
+        dpi=args.dpi,
+        lang=args.lang,
+    ):
+        sys.stdout.write(f"\n===== 第 {page.page_number} 页（{page.source}）=====\n")
+        sys.stdout.write(page.text)
+        sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""按 token 预算裁剪送入 Agent 的案件材料
+
+长篇庭审笔录、证据材料整本送入大模型既容易超出上下文，也拖慢响应、增加费用。
+本模块把提取出的文本按结构切块（Markdown 标题、「第X条」、笔录中的发言轮次），
+去掉页眉页脚等重复样板，再根据查询和 token 预算挑选最相关的块，按原文顺序拼接。
+
+用法：
+    python -m suitagent.packer input/庭审笔录.pdf --query "借款 利息 还款" --budget 6000
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import math
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .search import B, K1, tokenize
+
+# 粗略的 token 换算：国产模型的分词器中一个汉字约 0.6–1 个 token，取偏保守的值；
+# 英文、数字约 4 个字符一个 token
+CJK_TOKENS_PER_CHAR = 0.8
+ASCII_CHARS_PER_TOKEN = 4
+
+MIN_CHUNK_CHARS = 80
+MAX_CHUNK_CHARS = 1200
+
+# 在文中出现不少于该次数的短行视为页眉页脚等样板
+BOILERPLATE_MIN_REPEATS = 3
+BOILERPLATE_MAX_CHARS = 40
+
+OMITTED = "……（略）……"
+
+_HEADING_RE = re.compile(r"^\s*#{1,6}\s")
+_ARTICLE_RE = re.compile(r"^\s*第[一二三四五六七八九十百千零〇\d]+条")
+_SPEAKER_RE = re.compile(r"^\s*[\u4e00-\u9fa5]{1,10}[：:]")
+_PAGE_RE = re.compile(r"^\s*(?:.{0,30}第\s*\d+\s*页(?:\s*共\s*\d+\s*页)?|-\s*\d+\s*-|\d+\s*/\s*\d+)\s*$")
+
+
+def estimate_tokens(text: str) -> int:
+    """快速估算 token 数
+
+    汉字在 UTF-8 中占 3 字节，借助字节数与字符数之差估出多字节字符数量，
+    不必逐字符判断。
+    """
+    chars = len(text)
+    multibyte = (len(text.encode("utf-8")) - chars) // 2
+    return math.ceil(multibyte * CJK_TOKENS_PER_CHAR + (chars - multibyte) / ASCII_CHARS_PER_TOKEN)
+
+
+@dataclass
+class Chunk:
+    index: int
+    text: str
+    heading: str = ""  # 所属标题，拼接时一并输出以保留上下文
+    tokens: int = 0
+    score: float = 0.0
+
+
+@dataclass
+class PackResult:
+    chunks: List[Chunk]
+    total_chunks: int
+    original_tokens: int
+    packed_tokens: int
+    removed_boilerplate: int = 0
+    duplicates: int = 0
+    omitted: List[int] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        parts: List[str] = []
+        last_heading: Optional[str] = None
+        previous = -1
+        for chunk in self.chunks:
+            if chunk.index != previous + 1:
+                parts.append(OMITTED)
+            if chunk.heading and chunk.heading != last_heading and not chunk.text.startswith(chunk.heading):
+                parts.append(chunk.heading)
+            last_heading = chunk.heading
+            parts.append(chunk.text)
+            previous = chunk.index
+        if self.chunks and previous != self.total_chunks - 1:
+            parts.append(OMITTED)
+        return "\n\n".join(parts)
+
+
+def _boilerplate_lines(lines: List[str]) -> set:
+    """页码行，以及原样反复出现的短行（笔录中的简短发言如「答：是的。」除外）
+
+    重复判断不忽略数字：聊天记录中的「2023-01-05 10:22」、「借款金额 100000 元」格式相同、
+    数字不同，正是需要保留的案件事实；页码这类数字逐页变化的样板由 ``_PAGE_RE`` 识别。
+    """
+    counts = Counter(line.strip() for line in lines if line.strip())
+    return {
+        line for line, count in counts.items()
+        if _PAGE_RE.match(line)
+        or (count >= BOILERPLATE_MIN_REPEATS and len(line) <= BOILERPLATE_MAX_CHARS and not _is_boundary(line))
+    }
+
+
+def _is_boundary(line: str) -> bool:
+    return bool(_HEADING_RE.match(line) or _ARTICLE_RE.match(line) or _SPEAKER_RE.match(line))
+
+
+def split_chunks(text: str) -> List[Chunk]:
+    """按标题、条文和发言轮次切块，过短的块与后续合并，过长的块在句号处拆分"""
+    return _split(text)[0]
+
+
+def _split(text: str) -> Tuple[List[Chunk], int]:
+    """切块并返回被去除的样板行数"""
+    lines = text.replace("\f", "\n").splitlines()
+    boilerplate = _boilerplate_lines(lines)
+    removed = 0
+
+    blocks: List[List[str]] = [[]]
+    headings: List[str] = [""]
+    heading = ""
+    for line in lines:
+        stripped = line.strip()
+        if stripped in boilerplate:
+            removed += 1
+            continue
+        if (_is_boundary(line) or not stripped) and blocks[-1]:
+            blocks.append([])
+            headings.append(heading)
+        if _HEADING_RE.match(line):
+            heading = headings[-1] = stripped
+        if stripped:
+            blocks[-1].append(stripped)
+
+    chunks: List[Chunk] = []
+    buffer, buffer_heading = "", ""
+    for lines_in_block, block_heading in zip(blocks, headings):
+        block = "\n".join(lines_in_block)
+        if not block:
+            continue
+        if buffer and (block_heading != buffer_heading or len(buffer) + len(block) > MAX_CHUNK_CHARS):
+            chunks.append(Chunk(len(chunks), buffer, buffer_heading))
+            buffer = ""
+        if not buffer:
+            buffer_heading = block_heading
+        buffer = f"{buffer}\n{block}" if buffer else block
+        while len(buffer) > MAX_CHUNK_CHARS:
+            cut = buffer.rfind("。", 0, MAX_CHUNK_CHARS)
+            cut = cut + 1 if cut > MAX_CHUNK_CHARS // 2 else MAX_CHUNK_CHARS
+            chunks.append(Chunk(len(chunks), buffer[:cut], buffer_heading))
+            buffer = buffer[cut:].lstrip()
+        if len(buffer) >= MIN_CHUNK_CHARS:
+            chunks.append(Chunk(len(chunks), buffer, buffer_heading))
+            buffer = ""
+    if buffer:
+        chunks.append(Chunk(len(chunks), buffer, buffer_heading))
+
+    for chunk in chunks:
+        chunk.tokens = estimate_tokens(chunk.text)
+    return chunks, removed
+
+
+def _normalize(text: str) -> str:
+    """去重用的规范化：空白和标点合并为一个空格，数字保留（金额、日期不同的块不是重复）"""
+    return re.sub(r"[\s，。、；：,.;:（）()]+", " ", text).strip()
+
+
+def _score(chunks: List[Chunk], query: str) -> None:
+    """对每个块按查询计算 BM25 得分；无查询时按原文顺序递减，优先保留开头"""
+    terms = set(tokenize(query))
+    if not terms:
+        for chunk in chunks:
+            chunk.score = 1.0 / (1 + chunk.index)
+        return
+    tokenized = [tokenize(chunk.text) for chunk in chunks]
+    avgdl = sum(len(tokens) for tokens in tokenized) / max(1, len(tokenized))
+    df: Dict[str, int] = {term: sum(1 for tokens in tokenized if term in tokens) for term in terms}
+    n = len(chunks)
+    for chunk, tokens in zip(chunks, tokenized):
+        counts = Counter(token for token in tokens if token in terms)
+        norm = K1 * (1 - B + B * len(tokens) / max(avgdl, 1))
+        chunk.score = sum(
+            math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) * tf * (K1 + 1) / (tf + norm)
+            for t, tf in counts.items()
+        )
+
+
+def pack(text: str, query: str = "", budget: int = 8000) -> PackResult:
+    """在 ``budget`` 个 token 内挑选与 ``query`` 最相关的块
+
+    块按得分从高到低加入，放不下的跳过；首块（通常是标题、当事人信息）始终优先保留。
+    """
+    chunks, boilerplate = _split(text)
+    original = estimate_tokens(text)
+
+    seen = set()
+    unique: List[Chunk] = []
+    for chunk in chunks:
+        digest = hashlib.blake2b(_normalize(chunk.text).encode("utf-8"), digest_size=16).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        unique.append(chunk)
+
+    _score(unique, query)
+    ranked = sorted(unique, key=lambda c: (c.index != 0, -c.score, c.index))
+    selected: List[Chunk] = []
+    used = 0
+    for chunk in ranked:
+        if used + chunk.tokens > budget:
+            continue
+        if query and chunk.score <= 0 and chunk.index != 0:
+            continue
+        selected.append(chunk)
+        used += chunk.tokens
+
+    selected.sort(key=lambda c: c.index)
+    result = PackResult(
+        chunks=selected,
+        total_chunks=len(chunks),
+        original_tokens=original,
+        packed_tokens=0,
+        removed_boilerplate=boilerplate,
+        duplicates=len(chunks) - len(unique),
+    )
+    # 拼接时补入的标题和省略标记也占 token，超出预算时继续剔除得分最低的块
+    result.packed_tokens = estimate_tokens(result.text)
+    while result.packed_tokens > budget and len(result.chunks) > 1:
+        result.chunks.remove(min(result.chunks[1:], key=lambda c: c.score))
+        result.packed_tokens = estimate_tokens(result.text)
+    chosen = {chunk.index for chunk in result.chunks}
+    result.omitted = [chunk.index for chunk in chunks if chunk.index not in chosen]
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="按 token 预算挑选文档中与查询最相关的部分")
+    parser.add_argument("path", help="文档路径（PDF、Word、图片或文本）")
+    parser.add_argument("--query", default="", help="检索词，如争议焦点、证据名称")
+    parser.add_argument("--budget", type=int, default=8000, help="token 预算")
+    parser.add_argument("--stats", action="store_true", help="只输出统计，不输出正文")
+    args = parser.parse_args(argv)
+
+    from .cache import iter_pages_cached
+
+    text = "\n".join(page.text for page in iter_pages_cached(Path(args.path)))
+    result = pack(text, args.query, args.budget)
+    if not args.stats:
+        print(result.text)
+        print()
+    print(f"原文约 {result.original_tokens} tokens，裁剪后约 {result.packed_tokens} tokens"
+          f"（保留 {len(result.chunks)}/{result.total_chunks} 块，去重 {result.duplicates} 块，"
+          f"去除样板行 {result.removed_boilerplate} 行）", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
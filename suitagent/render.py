@@ -0,0 +1,532 @@
+"""Writer / Reporter 文书渲染：Markdown → Word / PDF
+
+Writer 的各类法律文书和 Reporter 的综合报告都以 Markdown 保存，本模块把它们转换为
+Word（.docx）和 PDF：
+
+- 模板每个进程只编译一次：Word 模板解析后拆成固定的包部件和正文前后缀，
+  PDF 的中文字体注册、段落样式也只创建一次；
+- 正文流式输出：Markdown 逐块解析，Word 正文直接写入压缩包中的 ``document.xml``，
+  PDF 段落按需交给 reportlab 排版，内存中不保留整份文档；
+- 一个案件的多份文书用多进程并行渲染。
+
+默认渲染 ``04_法律文书/`` 和 ``05_综合报告/`` 下的 Markdown，输出到同一目录。
+
+用法：
+    python -m suitagent.render output/案件A
+    python -m suitagent.render output/案件A --format docx --template templates/律所模板.docx
+    python -m suitagent.render output/案件A/05_综合报告/综合报告.md --format pdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from .batch import CASE_DIRS
+from .trace import emit, tracing
+
+RENDER_DIRS = (CASE_DIRS[3], CASE_DIRS[4])
+FORMATS = ("docx", "pdf")
+
+# reportlab 内置的 Adobe 简体中文字体，无需额外字体文件
+PDF_FONT = "STSong-Light"
+
+# 送入 reportlab 前缓冲的段落数
+PDF_BUFFER = 64
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_BULLET_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
+_TABLE_SEP_RE = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+_RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+# XML 1.0 不允许的控制字符（OCR 文本中偶有出现）
+_INVALID_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+# ---------------------------------------------------------------------------
+# Markdown 解析
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Block:
+    kind: str  # heading、paragraph、bullet、quote、code、table、rule
+    text: str = ""
+    level: int = 0
+    rows: List[List[str]] = field(default_factory=list)
+
+
+def _join(lines: List[str]) -> str:
+    """合并软换行：中文之间直接相连，西文之间补空格"""
+    text = lines[0]
+    for line in lines[1:]:
+        text += line if not text or ord(text[-1]) > 127 or ord(line[0]) > 127 else " " + line
+    return text
+
+
+def _split_row(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Block]:
+    """逐块解析 Markdown，只支持文书和报告中常用的语法"""
+    paragraph: List[str] = []
+    table: List[List[str]] = []
+    code = False
+
+    def flush() -> Iterator[Block]:
+        if paragraph:
+            yield Block("paragraph", _join(paragraph))
+            paragraph.clear()
+        if table:
+            yield Block("table", rows=[row[:] for row in table])
+            table.clear()
+
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            yield from flush()
+            code = not code
+            continue
+        if code:
+            yield Block("code", line)
+            continue
+        if stripped.startswith("|"):
+            if paragraph:
+                yield from flush()
+            if not _TABLE_SEP_RE.match(stripped):
+                table.append(_split_row(stripped))
+            continue
+        if table:
+            yield from flush()
+        if not stripped:
+            yield from flush()
+            continue
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            yield from flush()
+            yield Block("heading", heading.group(2), level=len(heading.group(1)))
+        elif _RULE_RE.match(stripped):
+            yield from flush()
+            yield Block("rule")
+        elif _BULLET_RE.match(line):
+            yield from flush()
+            yield Block("bullet", _BULLET_RE.match(line).group(1))
+        elif stripped.startswith(">"):
+            yield from flush()
+            yield Block("quote", stripped.lstrip("> "))
+        else:
+            paragraph.append(stripped)
+    yield from flush()
+
+
+def _read_lines(path: Path) -> Iterator[str]:
+    with open(path, encoding="utf-8") as fh:
+        yield from fh
+
+
+def _inline(text: str) -> List[Tuple[str, bool]]:
+    """拆分为 (文本, 是否加粗) 片段；链接只保留文字，去掉行内代码标记"""
+    text = _INVALID_XML_RE.sub("", _LINK_RE.sub(r"\1", text).replace("`", ""))
+    parts = _BOLD_RE.split(text)
+    return [(part, i % 2 == 1) for i, part in enumerate(parts) if part]
+
+
+# ---------------------------------------------------------------------------
+# Word
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class DocxTemplate:
+    """编译后的 Word 模板：除 ``document.xml`` 外的全部包部件，以及正文前后缀"""
+
+    parts: Tuple[Tuple[str, bytes], ...]
+    head: bytes  # 至正文内容开始处（含模板正文中原有的内容，如信笺抬头）
+    tail: bytes  # 节属性（页面设置）及结束标签
+    styles: FrozenSet[str]
+    text_width: int  # 版心宽度，单位 twip
+
+
+def _set_fonts(style, east_asia: str, size: float) -> None:
+    from docx.oxml.ns import qn
+    from docx.shared import Pt, RGBColor
+
+    style.font.name = "Times New Roman"
+    fonts = style.element.get_or_add_rPr().get_or_add_rFonts()
+    for attr in [attr for attr in fonts.attrib if attr.endswith("Theme")]:
+        del fonts.attrib[attr]
+    fonts.set(qn("w:eastAsia"), east_asia)
+    style.font.size = Pt(size)
+    style.font.color.rgb = RGBColor(0, 0, 0)
+
+
+@lru_cache(maxsize=None)
+def docx_template(path: Optional[str] = None) -> DocxTemplate:
+    """加载并编译 Word 模板，每个进程每个模板只做一次
+
+    ``path`` 为 None 时使用 python-docx 自带模板，并改为 A4 纸、宋体小四正文、黑体标题。
+    """
+    import io
+
+    import docx
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    from docx.shared import Cm
+
+    document = docx.Document(path)
+    if path is None:
+        section = document.sections[0]
+        section.page_width, section.page_height = Cm(21), Cm(29.7)
+        section.top_margin, section.bottom_margin = Cm(3.7), Cm(3.5)
+        section.left_margin, section.right_margin = Cm(2.8), Cm(2.6)
+        for name, font, size in (("Normal", "宋体", 12), ("Title", "黑体", 22), ("Heading 1", "黑体", 16),
+                                 ("Heading 2", "黑体", 14), ("Heading 3", "黑体", 12)):
+            _set_fonts(document.styles[name], font, size)
+        document.styles["Title"].paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        body = document.element.body
+        for child in list(body):
+            if child.tag != qn("w:sectPr"):
+                body.remove(child)
+
+    section = document.sections[-1]
+    text_width = (section.page_width - section.left_margin - section.right_margin) // 635
+    buffer = io.BytesIO()
+    document.save(buffer)
+    with zipfile.ZipFile(buffer) as archive:
+        parts = tuple((name, archive.read(name)) for name in archive.namelist() if name != "word/document.xml")
+        xml = archive.read("word/document.xml")
+    cut = xml.rfind(b"<w:sectPr")
+    if cut < 0:
+        cut = xml.rfind(b"</w:body>")
+    return DocxTemplate(
+        parts=parts,
+        head=xml[:cut],
+        tail=xml[cut:],
+        styles=frozenset(style.style_id for style in document.styles),
+        text_width=int(text_width),
+    )
+
+
+def _docx_runs(text: str) -> str:
+    return "".join(
+        f'<w:r>{"<w:rPr><w:b/></w:rPr>" if bold else ""}<w:t xml:space="preserve">{escape(part)}</w:t></w:r>'
+        for part, bold in _inline(text)
+    )
+
+
+def _docx_paragraph(text: str, style: Optional[str], template: DocxTemplate) -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style in template.styles else ""
+    return f"<w:p>{ppr}{_docx_runs(text)}</w:p>"
+
+
+_BORDERS = "".join(
+    f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="auto"/>'
+    for side in ("top", "left", "bottom", "right", "insideH", "insideV")
+)
+
+
+def _docx_table(rows: List[List[str]], template: DocxTemplate) -> str:
+    columns = max(len(row) for row in rows)
+    width = template.text_width // columns
+    parts = [
+        f'<w:tbl><w:tblPr><w:tblW w:w="{width * columns}" w:type="dxa"/><w:tblBorders>{_BORDERS}</w:tblBorders></w:tblPr>',
+        "<w:tblGrid>" + f'<w:gridCol w:w="{width}"/>' * columns + "</w:tblGrid>",
+    ]
+    for n, row in enumerate(rows):
+        parts.append("<w:tr>")
+        for cell in row + [""] * (columns - len(row)):
+            text = f"**{cell}**" if n == 0 and cell else cell
+            parts.append(f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/></w:tcPr><w:p>{_docx_runs(text)}</w:p></w:tc>')
+        parts.append("</w:tr>")
+    parts.append("</w:tbl><w:p/>")
+    return "".join(parts)
+
+
+def _docx_block(block: Block, template: DocxTemplate, first: bool) -> str:
+    if block.kind == "heading":
+        style = "Title" if first and block.level == 1 else f"Heading{min(block.level, 9)}"
+        return _docx_paragraph(block.text, style, template)
+    if block.kind == "bullet":
+        return _docx_paragraph(block.text, "ListBullet", template)
+    if block.kind == "quote":
+        return _docx_paragraph(block.text, "Quote", template)
+    if block.kind == "table":
+        return _docx_table(block.rows, template)
+    if block.kind == "rule":
+        return "<w:p/>"
+    if block.kind == "code":
+        return f'<w:p><w:r><w:t xml:space="preserve">{escape(_INVALID_XML_RE.sub("", block.text))}</w:t></w:r></w:p>'
+    return _docx_paragraph(block.text, None, template)
+
+
+def render_docx(source: Path, target: Path, template: Optional[str] = None) -> int:
+    """流式渲染 Word 文档，返回文件大小"""
+    compiled = docx_template(template)
+    tmp = target.with_name(f".{target.name}.tmp")
+    try:
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, data in compiled.parts:
+                archive.writestr(name, data)
+            with archive.open("word/document.xml", "w") as out:
+                out.write(compiled.head)
+                for n, block in enumerate(iter_blocks(_read_lines(source))):
+                    out.write(_docx_block(block, compiled, n == 0).encode("utf-8"))
+                out.write(compiled.tail)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return target.stat().st_size
+
+
+# ---------------------------------------------------------------------------
+# PDF
+# ---------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=None)
+def pdf_styles() -> Dict[str, object]:
+    """注册中文字体并创建段落样式，每个进程只做一次"""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.platypus import TableStyle
+
+    pdfmetrics.registerFont(UnicodeCIDFont(PDF_FONT))
+    pdfmetrics.registerFontFamily(PDF_FONT, normal=PDF_FONT, bold=PDF_FONT, italic=PDF_FONT, boldItalic=PDF_FONT)
+
+    normal = ParagraphStyle("Normal", fontName=PDF_FONT, fontSize=12, leading=20, wordWrap="CJK",
+                            firstLineIndent=24, spaceAfter=4)
+    plain = ParagraphStyle("Plain", parent=normal, firstLineIndent=0)
+    return {
+        "Normal": normal,
+        "Title": ParagraphStyle("Title", parent=plain, fontSize=22, leading=32, alignment=TA_CENTER, spaceAfter=16),
+        "Heading1": ParagraphStyle("Heading1", parent=plain, fontSize=16, leading=26, spaceBefore=12, spaceAfter=8),
+        "Heading2": ParagraphStyle("Heading2", parent=plain, fontSize=14, leading=24, spaceBefore=10, spaceAfter=6),
+        "Heading3": ParagraphStyle("Heading3", parent=plain, fontSize=12, leading=22, spaceBefore=8, spaceAfter=4),
+        "Bullet": ParagraphStyle("Bullet", parent=plain, leftIndent=18, bulletIndent=6, bulletFontName=PDF_FONT),
+        "Quote": ParagraphStyle("Quote", parent=plain, leftIndent=24, textColor=colors.HexColor("#555555")),
+        "Code": ParagraphStyle("Code", parent=plain, fontSize=10, leading=14),
+        "Cell": ParagraphStyle("Cell", parent=plain, fontSize=10.5, leading=16, spaceAfter=0),
+        "table": TableStyle([
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#EEEEEE")),
+        ]),
+    }
+
+
+def _pdf_markup(text: str) -> str:
+    return "".join(f"<b>{escape(part)}</b>" if bold else escape(part) for part, bold in _inline(text))
+
+
+def _pdf_flowables(blocks: Iterable[Block], width: float) -> Iterator[object]:
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    styles = pdf_styles()
+    for n, block in enumerate(blocks):
+        if block.kind == "heading":
+            style = "Title" if n == 0 and block.level == 1 else f"Heading{min(block.level, 3)}"
+            yield Paragraph(_pdf_markup(block.text), styles[style])
+        elif block.kind == "bullet":
+            yield Paragraph(_pdf_markup(block.text), styles["Bullet"], bulletText="•")
+        elif block.kind == "quote":
+            yield Paragraph(_pdf_markup(block.text), styles["Quote"])
+        elif block.kind == "code":
+            yield Paragraph(escape(block.text) or "&nbsp;", styles["Code"])
+        elif block.kind == "rule":
+            yield Spacer(width, 12)
+        elif block.kind == "table":
+            columns = max(len(row) for row in block.rows)
+            data = [
+                [Paragraph(_pdf_markup(f"**{cell}**" if i == 0 and cell else cell), styles["Cell"])
+                 for cell in row + [""] * (columns - len(row))]
+                for i, row in enumerate(block.rows)
+            ]
+            table = Table(data, colWidths=[width / columns] * columns, repeatRows=1)
+            table.setStyle(styles["table"])
+            yield table
+            yield Spacer(width, 8)
+        else:
+            yield Paragraph(_pdf_markup(block.text), styles["Normal"])
+
+
+class _FlowableStream(list):
+    """按需从生成器补充的排版对象列表
+
+    reportlab 的 ``build()`` 每处理一个对象前都会调用 ``len(flowables)``，
+    借此在缓冲不足时补充，内存中只保留少量尚未排版的段落。
+    """
+
+    def __init__(self, source: Iterable[object], buffer: int = PDF_BUFFER):
+        super().__init__()
+        self._source: Optional[Iterator[object]] = iter(source)
+        self._buffer = buffer
+
+    def __len__(self) -> int:
+        if self._source is not None and list.__len__(self) < self._buffer:
+            for item in self._source:
+                self.append(item)
+                if list.__len__(self) >= self._buffer * 2:
+                    break
+            else:
+                self._source = None
+        return list.__len__(self)
+
+
+def _page_number(canvas, doc) -> None:
+    from reportlab.lib.units import cm
+
+    canvas.saveState()
+    canvas.setFont(PDF_FONT, 9)
+    canvas.drawCentredString(doc.pagesize[0] / 2, 1.5 * cm, f"第 {doc.page} 页")
+    canvas.restoreState()
+
+
+def pdf_document(target: Path, title: str = ""):
+    """A4 版式（页边距同 Word 模板），页脚居中显示页码"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate
+
+    return SimpleDocTemplate(str(target), pagesize=A4, title=title, topMargin=3.7 * cm,
+                             bottomMargin=3.5 * cm, leftMargin=2.8 * cm, rightMargin=2.6 * cm)
+
+
+def render_pdf(source: Path, target: Path) -> int:
+    """流式渲染 PDF，返回文件大小"""
+    pdf_styles()
+    tmp = target.with_name(f".{target.name}.tmp")
+    doc = pdf_document(tmp, source.stem)
+    try:
+        doc.build(_FlowableStream(_pdf_flowables(iter_blocks(_read_lines(source)), doc.width)),
+                  onFirstPage=_page_number, onLaterPages=_page_number)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return target.stat().st_size
+
+
+# ---------------------------------------------------------------------------
+# 案件批量渲染
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class RenderResult:
+    source: str
+    target: str
+    seconds: float = 0.0
+    size: int = 0
+    error: str = ""
+    started: float = 0.0  # 开始时间（Unix 时间戳）
+
+
+def render(source: Path, fmt: str, template: Optional[str] = None) -> RenderResult:
+    """渲染单个文件，异常记录在结果中"""
+    target = source.with_suffix(f".{fmt}")
+    started = time.time()
+    start = time.perf_counter()
+    try:
+        size = render_docx(source, target, template) if fmt == "docx" else render_pdf(source, target)
+    except Exception as exc:  # 单个文件失败不影响其他文件
+        return RenderResult(str(source), str(target), time.perf_counter() - start, error=str(exc), started=started)
+    return RenderResult(str(source), str(target), time.perf_counter() - start, size, started=started)
+
+
+def _warm(formats: Sequence[str], template: Optional[str]) -> None:
+    """工作进程启动时预先编译模板"""
+    if "docx" in formats:
+        docx_template(template)
+    if "pdf" in formats:
+        pdf_styles()
+
+
+def case_sources(case_dir: Path) -> List[Path]:
+    """案件中由 Writer、Reporter 产出的 Markdown"""
+    return sorted(path for name in RENDER_DIRS for path in (case_dir / name).rglob("*.md"))
+
+
+def render_many(
+    sources: Iterable[Path],
+    formats: Sequence[str] = FORMATS,
+    workers: Optional[int] = None,
+    template: Optional[str] = None,
+    force: bool = False,
+) -> List[RenderResult]:
+    """并行渲染多个文件；目标文件比源文件新时跳过（``force`` 除外）
+
+    在追踪范围内时，每个输出文件记为一个 write span（见 :mod:`suitagent.trace`）。
+    """
+    jobs = [
+        (source, fmt) for source in sources for fmt in formats
+        if force or not source.with_suffix(f".{fmt}").exists()
+        or source.with_suffix(f".{fmt}").stat().st_mtime < source.stat().st_mtime
+    ]
+    # 大文件先提交，避免最后只剩一个进程在渲染长报告
+    jobs.sort(key=lambda job: job[0].stat().st_size, reverse=True)
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        results = [render(source, fmt, template) for source, fmt in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_warm, initargs=(tuple(formats), template)) as pool:
+            futures = [pool.submit(render, source, fmt, template) for source, fmt in jobs]
+            results = [future.result() for future in futures]
+    for result in results:
+        emit("渲染", "write", result.seconds, start=result.started, status="error" if result.error else "ok",
+             file=Path(result.target).name, bytes_read=os.path.getsize(result.source), bytes_written=result.size)
+    return results
+
+
+def render_case(case_dir: Path, **kwargs) -> List[RenderResult]:
+    with tracing(case_dir, "文书渲染"):
+        return render_many(case_sources(case_dir), **kwargs)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="将 Writer、Reporter 的 Markdown 文书渲染为 Word、PDF")
+    parser.add_argument("paths", nargs="+", help="案件输出目录或 Markdown 文件")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=list(FORMATS), help="输出格式")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数，默认 CPU 核数")
+    parser.add_argument("--template", default=None, help="Word 模板（.docx），默认使用内置 A4 模板")
+    parser.add_argument("--force", action="store_true", help="即使输出比源文件新也重新渲染")
+    args = parser.parse_args(argv)
+
+    sources: List[Path] = []
+    for raw in args.paths:
+        path = Path(raw)
+        sources.extend(case_sources(path) if path.is_dir() else [path])
+    if not sources:
+        print("没有需要渲染的 Markdown 文件")
+        return 0
+
+    start = time.perf_counter()
+    results = render_many(sources, args.format, args.workers, args.template, args.force)
+    if not results:
+        print("输出均比源文件新，无需渲染（可用 --force 重新渲染）")
+        return 0
+    for result in results:
+        status = f"失败：{result.error}" if result.error else f"{result.size / 1024:.0f} KB，{result.seconds:.2f}s"
+        print(f"{result.target}（{status}）")
+    print(f"共 {len(results)} 份，总耗时 {time.perf_counter() - start:.1f}s")
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,460 @@
+"""Researcher 本地检索：历史案件产出与法规库的全文索引
+
+对 ``output/`` 下所有 Markdown/DOCX 以及本地法规目录建立倒排索引：
+- 中文按相邻两字切分（二元组），英文、数字按词切分；
+- 文档按段落切成片段（passage），以片段为单位按 BM25 打分；
+- 索引以段（segment）为单位写入二进制文件，查询时内存映射读取，无需整体加载；
+- 增量更新：只为新增或修改过的文件写入新段，旧版本标记删除，删除过多时自动合并。
+
+用法：
+    python -m suitagent.search update
+    python -m suitagent.search update --roots output statutes
+    python -m suitagent.search query "民间借贷 利息 上限" -k 5
+    python -m suitagent.search compact
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .cache import file_digest, iter_pages_cached
+
+DEFAULT_INDEX_DIR = Path(os.environ.get("SUITAGENT_CACHE_DIR", ".cache/suitagent")) / "search"
+DEFAULT_ROOTS = ("output", "statutes")
+INDEXED_SUFFIXES = {".md", ".txt", ".docx"}
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+
+# 片段目标长度（字符）
+PASSAGE_CHARS = 400
+
+# BM25 参数
+K1 = 1.2
+B = 0.75
+
+# 段数超过该值，或已删除片段占比超过该比例时自动合并
+MAX_SEGMENTS = 8
+MAX_DELETED_RATIO = 0.3
+
+# 每段由五个文件组成：
+#   .lex  词典，按词项哈希排序：词项哈希、倒排表起始位置（条）、文档频率
+#   .post 倒排表：片段编号、词频（uint32 对）
+#   .len  片段属性：文档编号、词项数（uint32 对）
+#   .psg  片段正文位置：正文偏移、正文字节数
+#   .txt  片段正文（UTF-8）
+_LEX = struct.Struct("<QQI")
+_PSG = struct.Struct("<QI")
+_SEGMENT_SUFFIXES = (".lex", ".post", ".len", ".psg", ".txt")
+
+_TOKEN_RE = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]+|[A-Za-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """中文切成相邻二字组（单字成词时保留单字），英文数字转小写整词"""
+    tokens: List[str] = []
+    for run in _TOKEN_RE.findall(text):
+        if run[0].isascii():
+            tokens.append(run.lower())
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def _term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def split_passages(text: str, size: int = PASSAGE_CHARS) -> List[str]:
+    """按空行和标题切段，短段落合并到接近 ``size``，超长段落在句号处截断"""
+    blocks = [block.strip() for block in re.split(r"\n\s*\n|\n(?=#)", text) if block.strip()]
+    passages: List[str] = []
+    current = ""
+    for block in blocks:
+        while len(block) > size:
+            cut = block.rfind("。", 0, size)
+            cut = cut + 1 if cut > size // 2 else size
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(block[:cut])
+            block = block[cut:].strip()
+        if current and len(current) + len(block) > size:
+            passages.append(current)
+            current = ""
+        current = f"{current}\n\n{block}" if current else block
+    if current:
+        passages.append(current)
+    return passages
+
+
+def _uint32_array(data: bytes) -> array:
+    """把小端 uint32 序列转成数组，供按下标快速读取"""
+    values = array("I")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _read_document(path: Path) -> str:
+    if path.suffix.lower() in {".md", ".txt"}:
+        return path.read_text(encoding="utf-8", errors="replace")
+    return "\n\n".join(page.text for page in iter_pages_cached(path))
+
+
+@dataclass
+class Hit:
+    path: str
+    score: float
+    text: str
+
+
+class Segment:
+    """一个只读索引段，查询时内存映射各文件"""
+
+    def __init__(self, directory: Path, info: dict):
+        self.name = info["name"]
+        self.docs: List[dict] = info["docs"]
+        self.passages: int = info["passages"]
+        self.total_len: int = info["total_len"]
+        self._files = []
+        self._lex = self._map(directory / f"{self.name}.lex")
+        self._post = self._map(directory / f"{self.name}.post")
+        self._psg = self._map(directory / f"{self.name}.psg")
+        self._txt = self._map(directory / f"{self.name}.txt")
+        self._terms = len(self._lex) // _LEX.size
+        # 片段属性按下标交错存放：[文档编号0, 词项数0, 文档编号1, 词项数1, ...]
+        self.attributes = _uint32_array((directory / f"{self.name}.len").read_bytes())
+
+    def _map(self, path: Path):
+        if path.stat().st_size == 0:  # 空文件无法映射
+            return b""
+        fh = open(path, "rb")
+        self._files.append(fh)
+        return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        for mapped in (self._lex, self._post, self._psg, self._txt):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for fh in self._files:
+            fh.close()
+
+    def lookup(self, term: str) -> Tuple[int, int]:
+        """二分查找词项，返回 (倒排起始位置, 文档频率)；不存在时 df 为 0"""
+        target = _term_hash(term)
+        lo, hi = 0, self._terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, offset, df = _LEX.unpack_from(self._lex, mid * _LEX.size)
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                return offset, df
+        return 0, 0
+
+    def postings(self, offset: int, df: int) -> array:
+        """返回交错的 [片段编号, 词频, ...] 数组"""
+        return _uint32_array(self._post[offset * 8:(offset + df) * 8])
+
+    def doc_id(self, passage_id: int) -> int:
+        return self.attributes[passage_id * 2]
+
+    def text(self, passage_id: int) -> str:
+        text_offset, text_len = _PSG.unpack_from(self._psg, passage_id * _PSG.size)
+        return self._txt[text_offset:text_offset + text_len].decode("utf-8")
+
+    def iter_documents(self) -> Iterator[Tuple[int, List[str]]]:
+        """按文档返回片段正文，供合并段时重建索引"""
+        grouped: Dict[int, List[str]] = {}
+        for passage_id in range(self.passages):
+            grouped.setdefault(self.doc_id(passage_id), []).append(self.text(passage_id))
+        return iter(grouped.items())
+
+
+def _write_segment(directory: Path, name: str, documents: Sequence[Tuple[dict, List[str]]]) -> dict:
+    """把 (文档信息, 片段列表) 写成一个新段，返回段信息"""
+    postings: Dict[int, List[int]] = {}
+    attributes = array("I")
+    passage_records = []
+    texts = bytearray()
+    passage_id = 0
+    total_len = 0
+    for doc_id, (_, passages) in enumerate(documents):
+        for text in passages:
+            tokens = tokenize(text)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                postings.setdefault(_term_hash(token), []).extend((passage_id, tf))
+            encoded = text.encode("utf-8")
+            attributes.extend((doc_id, len(tokens)))
+            passage_records.append(_PSG.pack(len(texts), len(encoded)))
+            texts += encoded
+            total_len += len(tokens)
+            passage_id += 1
+
+    lex = bytearray()
+    post = array("I")
+    for key in sorted(postings):
+        entries = postings[key]
+        lex += _LEX.pack(key, len(post) // 2, len(entries) // 2)
+        post.extend(entries)
+
+    if sys.byteorder == "big":
+        post.byteswap()
+        attributes.byteswap()
+    files = {
+        ".lex": bytes(lex),
+        ".post": post.tobytes(),
+        ".len": attributes.tobytes(),
+        ".psg": b"".join(passage_records),
+        ".txt": bytes(texts),
+    }
+    for suffix in _SEGMENT_SUFFIXES:
+        (directory / f"{name}{suffix}").write_bytes(files[suffix])
+
+    return {
+        "name": name,
+        "docs": [info for info, _ in documents],
+        "passages": passage_id,
+        "total_len": total_len,
+    }
+
+
+class SearchIndex:
+    """分段倒排索引
+
+    Args:
+        directory: 索引目录
+    """
+
+    def __init__(self, directory: Path = DEFAULT_INDEX_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self.directory / META_FILE, encoding="utf-8") as fh:
+                self.meta = json.load(fh)
+        except (OSError, ValueError):
+            self.meta = {}
+        if self.meta.get("version") != FORMAT_VERSION:
+            self.meta = {"version": FORMAT_VERSION, "segments": [], "deleted": {}, "next_segment": 1}
+        self._segments: Optional[List[Segment]] = None
+
+    # ---- 读取 ----
+
+    @property
+    def segments(self) -> List[Segment]:
+        if self._segments is None:
+            self._segments = [Segment(self.directory, info) for info in self.meta["segments"]]
+        return self._segments
+
+    def close(self) -> None:
+        if self._segments is not None:
+            for segment in self._segments:
+                segment.close()
+            self._segments = None
+
+    def _deleted(self, segment: str) -> set:
+        return set(self.meta["deleted"].get(segment, ()))
+
+    def search(self, query: str, k: int = 10) -> List[Hit]:
+        """返回 BM25 得分最高的 ``k`` 个片段"""
+        terms = set(tokenize(query))
+        segments = self.segments
+        passages = sum(segment.passages for segment in segments)
+        if not terms or passages == 0:
+            return []
+        avgdl = sum(segment.total_len for segment in segments) / passages
+
+        # 文档频率跨段累加（含已删除片段，与常见搜索引擎的做法一致）
+        located = {term: [segment.lookup(term) for segment in segments] for term in terms}
+        idf = {}
+        for term, entries in located.items():
+            df = sum(count for _, count in entries)
+            if df:
+                idf[term] = math.log(1 + (passages - df + 0.5) / (df + 0.5))
+
+        candidates: List[Tuple[float, int, int]] = []
+        for seg_index, segment in enumerate(segments):
+            attributes = segment.attributes
+            scores: Dict[int, float] = {}
+            for term, weight in idf.items():
+                offset, df = located[term][seg_index]
+                if not df:
+                    continue
+                entries = segment.postings(offset, df)
+                for passage_id, tf in zip(entries[0::2], entries[1::2]):
+                    norm = K1 * (1 - B + B * attributes[passage_id * 2 + 1] / avgdl)
+                    scores[passage_id] = scores.get(passage_id, 0.0) + weight * tf * (K1 + 1) / (tf + norm)
+            deleted = self._deleted(segment.name)
+            best = heapq.nlargest(k, (
+                (score, seg_index, passage_id) for passage_id, score in scores.items()
+                if not deleted or attributes[passage_id * 2] not in deleted
+            ))
+            candidates.extend(best)
+
+        hits = []
+        for score, seg_index, passage_id in heapq.nlargest(k, candidates):
+            segment = segments[seg_index]
+            path = segment.docs[segment.doc_id(passage_id)]["path"]
+            hits.append(Hit(path, score, segment.text(passage_id)))
+        return hits
+
+    # ---- 写入 ----
+
+    def _save_meta(self) -> None:
+        tmp = self.directory / (META_FILE + ".tmp")
+        tmp.write_text(json.dumps(self.meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.directory / META_FILE)
+
+    def _live_documents(self) -> Dict[str, Tuple[str, int, dict]]:
+        """当前有效文档：路径 → (段名, 文档编号, 文档信息)"""
+        live = {}
+        for info in self.meta["segments"]:
+            deleted = self._deleted(info["name"])
+            for doc_id, doc in enumerate(info["docs"]):
+                if doc_id not in deleted:
+                    live[doc["path"]] = (info["name"], doc_id, doc)
+        return live
+
+    def update(self, roots: Iterable[Path]) -> Tuple[int, int]:
+        """扫描目录，为新增或修改的文件写入新段；返回 (新增/更新数, 删除数)"""
+        found: Dict[str, Path] = {}
+        for root in roots:
+            root = Path(root)
+            if not root.exists():
+                continue
+            for path in root.rglob("*"):
+                # 只看根目录以下的部分，根目录本身可以是 ../output、~/.local/... 这类路径
+                if (path.is_file() and path.suffix.lower() in INDEXED_SUFFIXES
+                        and not any(part.startswith(".") for part in path.relative_to(root).parts)):
+                    found[str(path)] = path
+
+        live = self._live_documents()
+        changed: List[Tuple[dict, List[str]]] = []
+        rewritten = set()
+        for key, path in sorted(found.items()):
+            stat = path.stat()
+            old = live.get(key)
+            if old and old[2]["size"] == stat.st_size and old[2]["mtime_ns"] == stat.st_mtime_ns:
+                continue
+            digest = file_digest(path)
+            doc = {"path": key, "hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            if old and old[2]["hash"] == digest:
+                old[2].update(doc)  # 仅修改时间变化
+                continue
+            # 内容已变化：无论新内容能否切出段落，旧段落都要作废
+            rewritten.add(key)
+            passages = split_passages(_read_document(path))
+            if passages:
+                changed.append((doc, passages))
+
+        removed = 0
+        for key, (segment, doc_id, _) in live.items():
+            if key not in found or key in rewritten:
+                self.meta["deleted"].setdefault(segment, []).append(doc_id)
+                removed += key not in found
+
+        self.close()
+        if changed:
+            name = f"seg_{self.meta['next_segment']:06d}"
+            self.meta["next_segment"] += 1
+            self.meta["segments"].append(_write_segment(self.directory, name, changed))
+        self._save_meta()
+
+        if self._needs_compaction():
+            self.compact()
+        return len(changed), removed
+
+    def _needs_compaction(self) -> bool:
+        total = sum(info["passages"] for info in self.meta["segments"])
+        if not total:
+            return False
+        deleted_passages = 0
+        for segment in self.segments:
+            deleted = self._deleted(segment.name)
+            if deleted:
+                deleted_passages += sum(1 for doc_id in segment.attributes[0::2] if doc_id in deleted)
+        return len(self.meta["segments"]) > MAX_SEGMENTS or deleted_passages / total > MAX_DELETED_RATIO
+
+    def compact(self) -> None:
+        """把所有段合并为一个，并清除已删除的文档"""
+        documents: List[Tuple[dict, List[str]]] = []
+        for segment in self.segments:
+            deleted = self._deleted(segment.name)
+            for doc_id, passages in segment.iter_documents():
+                if doc_id not in deleted:
+                    documents.append((segment.docs[doc_id], passages))
+        old = [info["name"] for info in self.meta["segments"]]
+        self.close()
+
+        name = f"seg_{self.meta['next_segment']:06d}"
+        self.meta["next_segment"] += 1
+        self.meta["segments"] = [_write_segment(self.directory, name, documents)] if documents else []
+        self.meta["deleted"] = {}
+        self._save_meta()
+        for segment in old:
+            for suffix in _SEGMENT_SUFFIXES:
+                try:
+                    (self.directory / f"{segment}{suffix}").unlink()
+                except OSError:
+                    pass
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="历史案件与法规库的本地全文检索")
+    parser.add_argument("--index-dir", default=str(DEFAULT_INDEX_DIR), help="索引目录")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_update = sub.add_parser("update", help="增量更新索引")
+    p_update.add_argument("--roots", nargs="+", default=list(DEFAULT_ROOTS), help="待索引目录")
+    p_query = sub.add_parser("query", help="检索片段")
+    p_query.add_argument("query")
+    p_query.add_argument("-k", type=int, default=10, help="返回片段数")
+    sub.add_parser("compact", help="合并索引段")
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(Path(args.index_dir))
+    try:
+        if args.command == "update":
+            start = time.perf_counter()
+            added, removed = index.update(Path(root) for root in args.roots)
+            print(f"新增/更新 {added} 个文件，删除 {removed} 个文件，"
+                  f"共 {len(index.meta['segments'])} 段，耗时 {time.perf_counter() - start:.2f}s")
+        elif args.command == "query":
+            start = time.perf_counter()
+            hits = index.search(args.query, k=args.k)
+            elapsed = (time.perf_counter() - start) * 1000
+            for rank, hit in enumerate(hits, start=1):
+                print(f"[{rank}] {hit.path}（{hit.score:.2f}）")
+                print("    " + hit.text.replace("\n", "\n    "))
+            print(f"共 {len(hits)} 条，耗时 {elapsed:.1f} ms")
+        elif args.command == "compact":
+            index.compact()
+            print(f"已合并为 {len(index.meta['segments'])} 段")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
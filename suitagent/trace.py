@@ -0,0 +1,441 @@
+"""运行追踪：各阶段耗时、token、读写字节数与缓存命中
+
+一次工作流运行中的每个环节记为一个 span（文档解析、文书识别、各 Agent、内嵌验证/专项审查、
+文件写入），写入 ``output/[案件编号]/.trace.jsonl``，每行一个 span。每个 span 记录墙钟时间、
+输入/输出 token、读写字节数和缓存命中，并通过父 span 还原调用层次。全所期限刷新
+（见 :mod:`suitagent.deadlines`）不属于单个案件，记入 ``output/.trace.jsonl``。
+
+Python 工具在 :func:`tracing` 范围内自动产生 span，不在范围内时为空操作，开销可忽略。
+由 Claude Code 执行的 Agent 步骤通过 ``record`` 子命令补记；同一次运行的各条记录
+通过环境变量 ``SUITAGENT_RUN_ID`` 关联。
+
+``summary`` 子命令汇总一个或多个案件的多次运行：每次运行的关键路径（决定总耗时的
+串行链条），以及按自身耗时排序的热点环节。
+
+用法：
+    python -m suitagent.trace summary output/案件A
+    python -m suitagent.trace summary output --top 20
+    python -m suitagent.trace record output/案件A --name Researcher --kind agent --seconds 312 \\
+        --tokens-in 48000 --tokens-out 6500
+    python -m suitagent.trace record output/案件A --name 专项审查 --kind review --agent Writer --seconds 95
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+TRACE_FILE = ".trace.jsonl"
+RUN_ENV = "SUITAGENT_RUN_ID"
+
+KINDS = ("run", "stage", "agent", "review", "llm", "write")
+COUNTERS = ("tokens_in", "tokens_out", "bytes_read", "bytes_written", "cache_hits", "cache_misses")
+
+# 关键路径上相邻环节之间允许的时间误差（秒）
+_EPSILON = 0.001
+
+
+def new_run_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+class Tracer:
+    """把 span 追加写入 JSONL 文件；多线程、多进程同时追加时每行保持完整"""
+
+    def __init__(self, path: Union[str, Path], run: Optional[str] = None):
+        self.path = Path(path)
+        self.run = run or os.environ.get(RUN_ENV) or new_run_id()
+        self._lock = threading.Lock()
+
+    def write(self, record: dict) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+
+_tracer: ContextVar[Optional[Tracer]] = ContextVar("suitagent_tracer", default=None)
+_current: ContextVar[Optional["Span"]] = ContextVar("suitagent_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str = "stage"
+    parent: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    start: float = field(default_factory=time.time)
+    seconds: float = 0.0
+    status: str = "ok"
+    counters: Dict[str, int] = field(default_factory=dict)
+    attrs: Dict[str, object] = field(default_factory=dict)
+    tracer: Optional[Tracer] = field(default=None, repr=False)
+    _t0: float = field(default_factory=time.perf_counter, repr=False)
+
+    def add(self, **counters: int) -> "Span":
+        """累加计数，如 ``span.add(tokens_in=1200, cache_hits=1)``"""
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        return self
+
+    def set(self, **attrs) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def end(self, status: Optional[str] = None) -> None:
+        if status:
+            self.status = status
+        self.seconds = time.perf_counter() - self._t0
+        if self.tracer is not None:
+            self.tracer.write(self.to_dict())
+            self.tracer = None  # 只写一次
+
+    def to_dict(self) -> dict:
+        return {
+            "run": self.tracer.run if self.tracer else None,
+            "id": self.id,
+            "parent": self.parent,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start, 6),
+            "seconds": round(self.seconds, 6),
+            "status": self.status,
+            **{key: self.counters.get(key, 0) for key in COUNTERS},
+            "attrs": self.attrs,
+        }
+
+
+def start_span(name: str, kind: str = "stage", **attrs) -> Span:
+    """开始一个 span 但不设为当前 span，需自行调用 ``end()``
+
+    用于生成器：生成器挂起时若仍占用上下文，调用方新建的 span 会被错误地挂到它下面。
+    """
+    parent = _current.get()
+    return Span(name, kind, parent=parent.id if parent else None, attrs=attrs, tracer=_tracer.get())
+
+
+@contextmanager
+def activate(current: Span) -> Iterator[Span]:
+    """临时把 :func:`start_span` 开始的 span 设为当前 span，范围内新建的 span 以它为父
+
+    生成器在两次 ``yield`` 之间（不挂起时）可以安全使用。
+    """
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, kind: str = "stage", **attrs) -> Iterator[Span]:
+    """记录一个环节，范围内新建的 span 以它为父"""
+    current = start_span(name, kind, **attrs)
+    try:
+        with activate(current):
+            yield current
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        current.end()
+
+
+@contextmanager
+def tracing(case_dir: Union[str, Path], name: str = "run", run: Optional[str] = None, **attrs) -> Iterator[Tracer]:
+    """在 ``case_dir/.trace.jsonl`` 中记录范围内的所有 span
+
+    线程池中的任务不会自动继承上下文，提交时需用 ``contextvars.copy_context().run`` 包装。
+    """
+    tracer = Tracer(Path(case_dir) / TRACE_FILE, run)
+    token = _tracer.set(tracer)
+    try:
+        with span(name, "run", **attrs):
+            yield tracer
+    finally:
+        _tracer.reset(token)
+
+
+def write_text(path: Union[str, Path], text: str) -> int:
+    """先写临时文件再替换，并记录一个 write span；返回字节数"""
+    path = Path(path)
+    data = text.encode("utf-8")
+    with span("写入", "write", file=path.name) as current:
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        current.add(bytes_written=len(data))
+    return len(data)
+
+
+def _finished(
+    tracer: Tracer,
+    parent: Optional[str],
+    name: str,
+    kind: str,
+    seconds: float,
+    start: Optional[float],
+    status: str,
+    values: dict,
+) -> dict:
+    counters = {key: int(values.pop(key) or 0) for key in COUNTERS if key in values}
+    item = Span(name, kind, parent=parent, start=start if start is not None else time.time() - seconds,
+                seconds=seconds, status=status, counters=counters, attrs=values, tracer=tracer)
+    data = item.to_dict()
+    tracer.write(data)
+    return data
+
+
+def emit(name: str, kind: str, seconds: float, start: Optional[float] = None, status: str = "ok", **values) -> None:
+    """在当前 span 下记录一个已计时的环节，如子进程中完成的渲染；不在追踪范围内时忽略"""
+    tracer = _tracer.get()
+    if tracer is not None:
+        parent = _current.get()
+        _finished(tracer, parent.id if parent else None, name, kind, seconds, start, status, values)
+
+
+def record(
+    case_dir: Union[str, Path],
+    name: str,
+    kind: str,
+    seconds: float,
+    start: Optional[float] = None,
+    run: Optional[str] = None,
+    status: str = "ok",
+    **values,
+) -> dict:
+    """补记一个在 Python 之外完成的环节（如由 Claude Code 执行的 Agent）"""
+    return _finished(Tracer(Path(case_dir) / TRACE_FILE, run), None, name, kind, seconds, start, status, values)
+
+
+# ---------------------------------------------------------------------------
+# 汇总
+# ---------------------------------------------------------------------------
+
+
+def trace_files(paths: Iterable[Union[str, Path]]) -> List[Path]:
+    """案件目录、输出根目录（含其下各案件，以及全所期限刷新的记录）或追踪文件本身"""
+    found: List[Path] = []
+    for path in map(Path, paths):
+        if path.is_file():
+            found.append(path)
+        elif path.is_dir():
+            if (path / TRACE_FILE).exists():
+                found.append(path / TRACE_FILE)
+            found.extend(sorted(path.glob(f"*/{TRACE_FILE}")))
+    return found
+
+
+def load_runs(files: Iterable[Path]) -> Dict[str, List[dict]]:
+    """按 (案件, 运行) 分组读取 span，跳过写了一半的行"""
+    runs: Dict[str, List[dict]] = defaultdict(list)
+    for path in files:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                item["case"] = path.parent.name
+                runs[f"{path.parent.name}/{item.get('run')}"].append(item)
+    return runs
+
+
+def _end(item: dict) -> float:
+    return item["start"] + item["seconds"]
+
+
+def critical_path(spans: List[dict]) -> List[dict]:
+    """从最晚结束的环节倒推：每一步取在它开始之前最晚结束的环节，得到决定总耗时的串行链条"""
+    remaining = sorted(spans, key=_end)
+    if not remaining:
+        return []
+    path = [remaining.pop()]
+    while True:
+        before = [item for item in remaining if _end(item) <= path[-1]["start"] + _EPSILON]
+        if not before:
+            break
+        path.append(before[-1])
+        remaining = remaining[:remaining.index(before[-1])]
+    return path[::-1]
+
+
+def _children(spans: List[dict]) -> Dict[Optional[str], List[dict]]:
+    children: Dict[Optional[str], List[dict]] = defaultdict(list)
+    ids = {item["id"] for item in spans}
+    for item in spans:
+        # 补记的 Agent 没有父 span，挂在运行的根上
+        children[item["parent"] if item["parent"] in ids else None].append(item)
+    return children
+
+
+def _top_level(spans: List[dict], children: Dict[Optional[str], List[dict]]) -> List[dict]:
+    top = [item for item in children[None] if item["kind"] != "run"]
+    for root in (item for item in children[None] if item["kind"] == "run"):
+        top.extend(children[root["id"]])
+    return top
+
+
+def self_seconds(spans: List[dict]) -> Dict[str, float]:
+    """扣除子 span 后的自身耗时；并行的子 span 合计可能超过父 span，此时记为 0"""
+    children = _children(spans)
+    return {
+        item["id"]: max(0.0, item["seconds"] - sum(child["seconds"] for child in children[item["id"]]))
+        for item in spans
+    }
+
+
+@dataclass
+class Hotspot:
+    kind: str
+    name: str
+    count: int = 0
+    runs: int = 0
+    total: float = 0.0
+    self_total: float = 0.0
+    durations: List[float] = field(default_factory=list)
+    counters: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(COUNTERS, 0))
+    errors: int = 0
+
+    @property
+    def p95(self) -> float:
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+
+    @property
+    def cache_hit_rate(self) -> Optional[float]:
+        lookups = self.counters["cache_hits"] + self.counters["cache_misses"]
+        return self.counters["cache_hits"] / lookups if lookups else None
+
+
+def hotspots(runs: Dict[str, List[dict]]) -> List[Hotspot]:
+    """按 (类型, 名称) 聚合所有运行，按自身耗时合计降序"""
+    table: Dict[tuple, Hotspot] = {}
+    for spans in runs.values():
+        own = self_seconds(spans)
+        seen = set()
+        for item in spans:
+            if item["kind"] == "run":
+                continue
+            key = (item["kind"], item["name"])
+            spot = table.setdefault(key, Hotspot(*key))
+            spot.count += 1
+            spot.total += item["seconds"]
+            spot.self_total += own[item["id"]]
+            spot.durations.append(item["seconds"])
+            spot.errors += item.get("status") == "error"
+            for counter in COUNTERS:
+                spot.counters[counter] += item.get(counter, 0)
+            if key not in seen:
+                spot.runs += 1
+                seen.add(key)
+    return sorted(table.values(), key=lambda spot: spot.self_total, reverse=True)
+
+
+def _pad(text: str, width: int, right: bool = False) -> str:
+    """按显示宽度补齐，汉字占两列"""
+    fill = " " * max(0, width - sum(2 if ord(char) > 0x2E80 else 1 for char in text))
+    return fill + text if right else text + fill
+
+
+def _label(item: dict) -> str:
+    attrs = item.get("attrs", {})
+    detail = attrs.get("agent") or attrs.get("file")
+    return f"{item['name']}（{detail}）" if detail else item["name"]
+
+
+def _print_path(spans: List[dict], children: Dict[Optional[str], List[dict]], depth: int, max_depth: int) -> None:
+    path = critical_path(spans)
+    previous_end = None
+    for item in path:
+        wait = item["start"] - previous_end if previous_end is not None else 0.0
+        gap = f"  等待 {wait:.1f}s" if wait > 1 else ""
+        tokens = f"  tokens {item.get('tokens_in', 0)}/{item.get('tokens_out', 0)}" if item.get("tokens_in") else ""
+        print(f"{'  ' * depth}- [{item['kind']}] {_label(item)} {item['seconds']:.2f}s{tokens}{gap}")
+        previous_end = _end(item)
+        if depth < max_depth and children[item["id"]]:
+            _print_path(children[item["id"]], children, depth + 1, max_depth)
+
+
+def summarize(runs: Dict[str, List[dict]], last: int = 3, top: int = 15, depth: int = 2) -> None:
+    from .cache import format_size
+
+    ordered = sorted(runs.items(), key=lambda entry: min(item["start"] for item in entry[1]))
+    print(f"共 {len(runs)} 次运行，{sum(len(spans) for spans in runs.values())} 个 span")
+    for key, spans in ordered[-last:] if last else ordered:
+        start = min(item["start"] for item in spans)
+        wall = max(_end(item) for item in spans) - start
+        stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(start))
+        print(f"\n== {key}（{stamp}，总耗时 {wall:.1f}s）关键路径：")
+        children = _children(spans)
+        _print_path(_top_level(spans, children), children, 1, depth)
+
+    print(f"\n== 热点（按自身耗时，前 {top} 项）")
+    header = [("类型", 6), ("环节", 24), ("次数", 5), ("自身合计", 9), ("总计", 9), ("P95", 8),
+              ("tokens 入/出", 16), ("读/写", 21), ("缓存命中", 8)]
+    print(" ".join(_pad(title, width, right=index > 1) for index, (title, width) in enumerate(header)))
+    for spot in hotspots(runs)[:top]:
+        rate = spot.cache_hit_rate
+        tokens = f"{spot.counters['tokens_in']}/{spot.counters['tokens_out']}"
+        io = f"{format_size(spot.counters['bytes_read'])}/{format_size(spot.counters['bytes_written'])}"
+        errors = f"  失败 {spot.errors}" if spot.errors else ""
+        print(f"{spot.kind:<6} {_pad(spot.name, 24)} {spot.count:>5} {spot.self_total:>8.1f}s "
+              f"{spot.total:>8.1f}s {spot.p95:>7.2f}s {tokens:>16} {io:>21} "
+              f"{'-' if rate is None else f'{rate:.0%}':>8}{errors}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="记录并汇总工作流各环节的耗时与资源消耗")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_summary = sub.add_parser("summary", help="汇总关键路径和热点")
+    p_summary.add_argument("paths", nargs="+", help="案件目录、输出根目录或 .trace.jsonl")
+    p_summary.add_argument("--last", type=int, default=3, help="显示最近几次运行的关键路径（0 为全部）")
+    p_summary.add_argument("--top", type=int, default=15, help="热点条数")
+    p_summary.add_argument("--depth", type=int, default=2, help="关键路径展开的层数")
+
+    p_record = sub.add_parser("record", help="补记一个在 Python 之外完成的环节")
+    p_record.add_argument("case_dir", help="案件输出目录")
+    p_record.add_argument("--name", required=True, help="环节名称，如 Researcher、专项审查")
+    p_record.add_argument("--kind", choices=KINDS, default="agent")
+    p_record.add_argument("--seconds", type=float, required=True, help="耗时（秒）")
+    p_record.add_argument("--start", type=float, help="开始时间（Unix 时间戳），默认按结束于现在推算")
+    p_record.add_argument("--agent", help="审查所属的 Agent")
+    p_record.add_argument("--run", help=f"运行 ID，默认取环境变量 {RUN_ENV}")
+    p_record.add_argument("--status", choices=("ok", "error"), default="ok")
+    for counter in COUNTERS:
+        p_record.add_argument(f"--{counter.replace('_', '-')}", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        extra = {"agent": args.agent} if args.agent else {}
+        data = record(args.case_dir, args.name, args.kind, args.seconds, start=args.start, run=args.run,
+                      status=args.status, **{key: getattr(args, key) for key in COUNTERS}, **extra)
+        print(f"已记录 {args.name}（运行 {data['run']}，{args.seconds:.1f}s）")
+        return 0
+
+    runs = load_runs(trace_files(args.paths))
+    if not runs:
+        print("没有找到追踪记录")
+        return 0
+    summarize(runs, last=args.last, top=args.top, depth=args.depth)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from suitagent.deadlines import (
+    DONE, EVENT_COLUMNS, INVALID, NORMAL, OVERDUE, RESULT_COLUMNS, URGENT, add_periods, compute, load_calendar,
+)
+
+TODAY = dt.date(2024, 9, 20)
+
+
+def _events(*rows):
+    return pd.DataFrame([("案件A", *row) for row in rows], columns=EVENT_COLUMNS)
+
+
+def _due(start, amount, unit):
+    return str(add_periods([start], [amount], [unit])[0])
+
+
+@pytest.mark.parametrize("start, amount, unit, expected", [
+    ("2024-01-01", 15, "日", "2024-01-16"),
+    ("2024-01-31", 1, "月", "2024-02-29"),
+    ("2023-01-31", 1, "月", "2023-02-28"),
+    ("2023-08-31", 6, "月", "2024-02-29"),
+    ("2024-02-29", 1, "年", "2025-02-28"),
+    ("2024-03-15", 2, "年", "2026-03-15"),
+])
+def test_add_periods_clips_to_month_end(start, amount, unit, expected):
+    assert _due(start, amount, unit) == expected
+
+
+def test_add_periods_is_vectorized_over_mixed_units():
+    due = add_periods(["2024-01-31", "2024-01-31", "2024-01-31"], [10, 1, 1], ["日", "月", "年"])
+    assert due.astype(str).tolist() == ["2024-02-10", "2024-02-29", "2025-01-31"]
+
+
+def test_due_date_rolls_over_national_day_holiday():
+    # 2024-09-16 起算 15 日届满于 10 月 1 日，国庆放假至 10 月 7 日
+    result = compute(_events(("答辩期", "2024-09-16", "", "", "")), TODAY)
+    assert result.loc[0, "届满日"] == dt.date(2024, 10, 8)
+    assert "已顺延" in result.loc[0, "备注"]
+
+
+def test_makeup_workday_is_not_rolled():
+    # 2024-10-12 是周六，但为国庆调休上班日
+    result = compute(_events(("答辩期", "2024-09-27", "", "", "")), TODAY)
+    assert result.loc[0, "届满日"] == dt.date(2024, 10, 12)
+    assert result.loc[0, "备注"] == ""
+
+
+def test_ordinary_weekend_rolls_to_monday():
+    result = compute(_events(("答辩期", "2024-10-04", "", "", "")), TODAY)
+    assert result.loc[0, "届满日"] == dt.date(2024, 10, 21)
+
+
+def test_workdays_between_counts_makeup_days_and_skips_holidays():
+    calendar = load_calendar()
+    # 9 月 27 日（不含）至 10 月 12 日（含）：9 月 29 日（周日调休）、9 月 30 日、10 月 8 日至 11 日、10 月 12 日
+    count = calendar.workdays_between(np.array(["2024-09-27"], "datetime64[D]"),
+                                      np.array(["2024-10-12"], "datetime64[D]"))
+    assert count.tolist() == [7]
+
+
+def test_statuses_by_remaining_workdays():
+    result = compute(_events(
+        ("答辩期", "2024-09-01", "", "", ""),     # 9 月 16 日届满，已逾期
+        ("答辩期", "2024-09-10", "", "", ""),     # 9 月 25 日届满，剩 3 个工作日
+        ("申请再审", "2024-09-10", "", "", ""),   # 2025 年 3 月届满
+        ("答辩期", "2024-09-01", "", "是", ""),   # 已办结
+    ), TODAY)
+    assert result.set_index("起算日").groupby(level=0)["状态"].apply(list).to_dict() == {
+        dt.date(2024, 9, 1): [OVERDUE, DONE],
+        dt.date(2024, 9, 10): [URGENT, NORMAL],
+    }
+
+
+def test_custom_period_overrides_rule():
+    result = compute(_events(("举证期限", "2024年9月20日", "30日", "", "")), TODAY)
+    assert result.loc[0, "届满日"] == dt.date(2024, 10, 21)  # 10 月 20 日为周日
+
+
+def test_unparseable_and_out_of_range_rows_are_invalid_without_affecting_others():
+    result = compute(_events(
+        ("答辩期", "1999-12-01", "", "", ""),
+        ("诉讼时效", "2059-06-01", "", "", ""),
+        ("答辩期", "不详", "", "", ""),
+        ("自定义事件", "2024-09-01", "", "", ""),
+        ("答辩期", "2024-10-04", "", "", ""),
+    ), TODAY)
+    invalid = result[result["状态"] == INVALID]
+    assert len(invalid) == 4
+    assert invalid["届满日"].isna().all()
+    assert invalid["剩余天数"].isna().all()
+    assert (invalid["备注"] == "起算日或期间无法识别").all()
+    assert result[result["状态"] != INVALID]["届满日"].tolist() == [dt.date(2024, 10, 21)]
+
+
+def test_empty_input():
+    result = compute(pd.DataFrame(columns=EVENT_COLUMNS), TODAY)
+    assert result.empty
+    assert tuple(result.columns) == RESULT_COLUMNS
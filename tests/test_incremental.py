@@ -0,0 +1,92 @@
+import pytest
+
+from suitagent.incremental import SCENARIO_AGENTS, Manifest, plan, run_plan, workflow_dag
+
+AGENTS = SCENARIO_AGENTS["证据质证"]
+
+OUTPUTS = {
+    "DocAnalyzer": "01_案件分析/文档分析.md",
+    "EvidenceAnalyzer": "01_案件分析/证据分析.md",
+    "Researcher": "02_法律研究/法律研究报告.md",
+    "Writer": "03_文书/质证意见.md",
+    "Summarizer": "04_汇总/案件摘要.md",
+}
+
+
+@pytest.fixture
+def case(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # 解析缓存写在当前目录下
+    inputs = tmp_path / "input"
+    inputs.mkdir()
+    (inputs / "起诉状.txt").write_text(
+        "民事起诉状\n原告：张三\n被告：李四\n诉讼请求：判令被告归还借款100000元。\n事实与理由：……\n此致\n某某人民法院\n",
+        encoding="utf-8",
+    )
+    return tmp_path / "output" / "案件A", inputs
+
+
+def _add_evidence(inputs):
+    path = inputs / "证据目录.txt"
+    path.write_text("证据目录\n证据一：借条\n证明目的：被告向原告借款100000元。\n", encoding="utf-8")
+
+
+def _agents(the_plan):
+    return [[node.agent for node in stage] for stage in the_plan.stages]
+
+
+def _write(case_dir, agent):
+    path = case_dir / OUTPUTS[agent]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    version = path.read_text(encoding="utf-8") + "+" if path.exists() else ""
+    path.write_text(version + agent, encoding="utf-8")
+    return [OUTPUTS[agent]]
+
+
+def _record(case_dir, inputs, the_plan):
+    """按计划逐个运行并登记，相当于依次调用 ``incremental record``"""
+    dag = workflow_dag(AGENTS)
+    for stage in the_plan.stages:
+        for node in stage:
+            manifest = Manifest(case_dir)
+            manifest.record(
+                node.agent,
+                _write(case_dir, node.agent),
+                inputs=sorted(str(p) for p in inputs.iterdir()) if not dag[node.agent] else (),
+                upstream=[OUTPUTS[dep] for dep in dag[node.agent]],
+            )
+            manifest.save()
+
+
+def test_new_evidence_does_not_dirty_researcher_across_plan_record_plan(case):
+    case_dir, inputs = case
+    _record(case_dir, inputs, plan(case_dir, inputs.iterdir(), AGENTS))
+    assert plan(case_dir, inputs.iterdir(), AGENTS).stages == []
+
+    _add_evidence(inputs)
+    first = plan(case_dir, inputs.iterdir(), AGENTS)
+    assert _agents(first) == [["DocAnalyzer"], ["EvidenceAnalyzer"], ["Writer"], ["Summarizer"]]
+
+    _record(case_dir, inputs, first)
+    assert plan(case_dir, inputs.iterdir(), AGENTS).stages == []
+
+
+def test_complaint_change_still_reaches_researcher(case):
+    case_dir, inputs = case
+    _add_evidence(inputs)
+    _record(case_dir, inputs, plan(case_dir, inputs.iterdir(), AGENTS))
+
+    with open(inputs / "起诉状.txt", "a", encoding="utf-8") as fh:
+        fh.write("诉讼请求：判令被告支付逾期利息。\n")
+    stages = _agents(plan(case_dir, inputs.iterdir(), AGENTS))
+    assert "Researcher" in sum(stages, [])
+    assert "EvidenceAnalyzer" not in sum(stages, [])
+
+
+def test_run_plan_leaves_nothing_to_do(case):
+    case_dir, inputs = case
+    run_plan(case_dir, plan(case_dir, inputs.iterdir(), AGENTS), lambda node: _write(case_dir, node.agent),
+             list(inputs.iterdir()))
+    _add_evidence(inputs)
+    run_plan(case_dir, plan(case_dir, inputs.iterdir(), AGENTS), lambda node: _write(case_dir, node.agent),
+             list(inputs.iterdir()))
+    assert plan(case_dir, inputs.iterdir(), AGENTS).stages == []
@@ -0,0 +1,41 @@
+from suitagent.packer import pack
+
+CHAT_LOG = """微信聊天记录（证据三）
+2023-01-05 10:22
+张三：钱已经转过去了
+借款金额 100000 元
+某某律师事务所 证据材料
+第 1 页 共 3 页
+2023-02-10 09:15
+李四：收到，年底还你
+借款金额 50000 元
+某某律师事务所 证据材料
+第 2 页 共 3 页
+2023-12-31 20:40
+张三：到期了，什么时候还？
+借款金额 150000 元
+某某律师事务所 证据材料
+第 3 页 共 3 页
+"""
+
+
+def test_repeated_formats_with_different_numbers_are_kept():
+    text = pack(CHAT_LOG, budget=10_000).text
+    for fact in ("2023-01-05 10:22", "2023-02-10 09:15", "2023-12-31 20:40",
+                 "借款金额 100000 元", "借款金额 50000 元", "借款金额 150000 元"):
+        assert fact in text
+
+
+def test_page_numbers_and_identical_headers_are_removed():
+    result = pack(CHAT_LOG, budget=10_000)
+    assert "第 2 页" not in result.text
+    assert "某某律师事务所 证据材料" not in result.text
+    assert result.removed_boilerplate == 6
+
+
+def test_chunks_differing_only_in_numbers_are_not_duplicates():
+    first = "原告：2023年1月5日，原告通过银行转账向被告支付借款100000元，被告当日出具借条一张，约定于当年年底前归还全部款项，并按年利率百分之六计算利息，逾期另计违约金。"
+    second = "原告：2024年3月8日，原告通过银行转账向被告支付借款250000元，被告当日出具借条一张，约定于当年年底前归还全部款项，并按年利率百分之六计算利息，逾期另计违约金。"
+    result = pack(f"{first}\n\n{second}\n\n{first}", budget=10_000)
+    assert result.duplicates == 1
+    assert "100000元" in result.text and "250000元" in result.text